@@ -1,10 +1,56 @@
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, CONF_HOST, CONF_PORT, CONF_SLAVE, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_SLAVE,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_GAP,
+    CONF_MAX_REGISTERS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_PIPELINE_WINDOW,
+    CONF_WRITE_DEBOUNCE,
+    CONF_VERIFY_BACKOFF,
+    CONF_VERIFY_TIMEOUT,
+    CONF_STALE_AFTER,
+    CONF_BURST_INTERVAL,
+    CONF_BURST_DURATION,
+    CONF_REQUEST_TIMEOUT,
+    CONF_CYCLE_BUDGET,
+    CONF_HISTORY_DEPTH,
+    CONF_DERIVED_SMOOTHING,
+    CONF_DERIVED_WINDOW,
+    CONF_LONG_TERM_STATISTICS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_GAP,
+    DEFAULT_MAX_REGISTERS,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_WRITE_DEBOUNCE,
+    DEFAULT_VERIFY_BACKOFF,
+    DEFAULT_VERIFY_TIMEOUT,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_BURST_INTERVAL,
+    DEFAULT_BURST_DURATION,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_CYCLE_BUDGET,
+    DEFAULT_HISTORY_DEPTH,
+    DEFAULT_DERIVED_SMOOTHING,
+    DEFAULT_DERIVED_WINDOW,
+    DEFAULT_LONG_TERM_STATISTICS,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .gateway import async_get_gateway, async_release_gateway
 from .modbus_controller import ThesslaGreenModbusController
 from .coordinator import ThesslaGreenCoordinator
+from .services import async_setup_services
 
 import logging
 
@@ -14,6 +60,7 @@ PLATFORMS = ["sensor", "switch", "binary_sensor", "select", "number"]
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up from YAML (not used)."""
+    async_setup_services(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -25,12 +72,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     slave = entry.data[CONF_SLAVE]
     update_interval = entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
 
+    # Kilka central na jednej magistrali RS485 dzieli jedno połączenie z bramką
+    gateway = async_get_gateway(hass, host, port)
+
     # Tworzenie kontrolera Modbus
     controller = ThesslaGreenModbusController(
         host=host,
         port=port,
         slave_id=slave,
         update_interval=update_interval,
+        max_gap=entry.options.get(CONF_MAX_GAP, DEFAULT_MAX_GAP),
+        max_registers=entry.options.get(CONF_MAX_REGISTERS, DEFAULT_MAX_REGISTERS),
+        pipeline_window=entry.options.get(CONF_PIPELINE_WINDOW, DEFAULT_PIPELINE_WINDOW),
+        write_debounce=entry.options.get(CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE),
+        verify_backoff=entry.options.get(CONF_VERIFY_BACKOFF, DEFAULT_VERIFY_BACKOFF),
+        verify_timeout=entry.options.get(CONF_VERIFY_TIMEOUT, DEFAULT_VERIFY_TIMEOUT),
+        request_timeout=entry.options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+        gateway=gateway,
     )
 
     # Tworzenie koordynatora danych
@@ -38,13 +96,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass=hass,
         controller=controller,
         scan_interval=update_interval,
+        fast_scan_interval=entry.options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+        slow_scan_interval=entry.options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+        stale_after=entry.options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+        burst_interval=entry.options.get(CONF_BURST_INTERVAL, DEFAULT_BURST_INTERVAL),
+        burst_duration=entry.options.get(CONF_BURST_DURATION, DEFAULT_BURST_DURATION),
+        cycle_budget=entry.options.get(CONF_CYCLE_BUDGET, DEFAULT_CYCLE_BUDGET),
+        history_depth=entry.options.get(CONF_HISTORY_DEPTH, DEFAULT_HISTORY_DEPTH),
+        derived_smoothing=entry.options.get(CONF_DERIVED_SMOOTHING, DEFAULT_DERIVED_SMOOTHING),
+        derived_window=entry.options.get(CONF_DERIVED_WINDOW, DEFAULT_DERIVED_WINDOW),
+        long_term_statistics=entry.options.get(CONF_LONG_TERM_STATISTICS, DEFAULT_LONG_TERM_STATISTICS),
+        snapshot_store=Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.snapshot"),
     )
 
+    # Rejestry używane wyłącznie przez wyłączone encje nie są odpytywane
+    _async_update_polled_registers(hass, entry, controller)
+
+    # Start bez czekania na centralę: encje dostają ostatni zapisany obraz rejestrów,
+    # a pierwszy odczyt wykonuje się w tle (wolna lub wyłączona centrala nie blokuje startu HA)
     try:
-        await coordinator.async_config_entry_first_refresh()
+        snapshot = await coordinator.snapshot_store.async_load()
+        if snapshot:
+            coordinator.async_restore_snapshot(snapshot)
     except Exception as e:
-        _LOGGER.error("Failed to fetch initial data: %s", e)
-        return False
+        _LOGGER.warning("Ignoring saved register snapshot for slave %d: %s", slave, e)
 
     # Zapisywanie instancji w hass.data
     hass.data[DOMAIN][entry.entry_id] = {
@@ -57,8 +132,36 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Forward setup dla każdej platformy
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {slave}")
+
+    # Zmiana opcji wymaga przebudowania kontrolera (plan odczytów itd.)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    @callback
+    def _async_entity_registry_updated(event: Event) -> None:
+        if event.data["action"] == "update" and "disabled_by" in event.data.get("changes", {}):
+            _async_update_polled_registers(hass, entry, controller)
+
+    entry.async_on_unload(
+        hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _async_entity_registry_updated)
+    )
+
     return True
 
+@callback
+def _async_update_polled_registers(hass: HomeAssistant, entry: ConfigEntry, controller: ThesslaGreenModbusController) -> None:
+    """Przekazuje kontrolerowi unique_id wyłączonych encji tego wpisu – plan odczytów jest przeliczany."""
+    registry = er.async_get(hass)
+    controller.set_disabled_consumers(
+        entity.unique_id
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id)
+        if entity.disabled_by is not None
+    )
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload Thessla Green integration after options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Thessla Green integration."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -66,6 +169,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     data = hass.data[DOMAIN].pop(entry.entry_id, None)
     if data:
         controller: ThesslaGreenModbusController = data["controller"]
+        await data["coordinator"].async_save_snapshot()
         await controller.stop()
+        async_release_gateway(hass, controller.gateway)
 
     return unload_ok
\ No newline at end of file
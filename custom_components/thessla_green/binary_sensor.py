@@ -7,32 +7,35 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 
 from . import DOMAIN
+from . import registers
+from .registers import RegisterDef
 from .coordinator import ThesslaGreenCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Adres, typ i grupa odpytywania pochodzą z mapy rejestrów (registers.py)
 BINARY_SENSORS = [
     # Odczyt z COILS
-    {"name": "Rekuperator Silownik bypassu", "address": 9, "input_type": "coil", "icon_on": "mdi:valve-open", "icon_off": "mdi:valve-closed"},
-    {"name": "Rekuperator Potwierdzenie pracy", "address": 11, "input_type": "coil", "icon_on": "mdi:check-circle", "icon_off": "mdi:circle-outline"},
+    {"name": "Rekuperator Silownik bypassu", "register": registers.SILOWNIK_BYPASSU, "icon_on": "mdi:valve-open", "icon_off": "mdi:valve-closed"},
+    {"name": "Rekuperator Potwierdzenie pracy", "register": registers.POTWIERDZENIE_PRACY, "icon_on": "mdi:check-circle", "icon_off": "mdi:circle-outline"},
 
     # Odczyt z HOLDING REGISTERS
-    {"name": "Rekuperator Alarm", "address": 8192, "input_type": "holding", "device_class": "problem"},
-    {"name": "Rekuperator Awaria CF Nawiewu", "address": 8330, "input_type": "holding", "device_class": "problem"},
-    {"name": "Rekuperator Awaria CF Wywiewu", "address": 8331, "input_type": "holding", "device_class": "problem"},
-    {"name": "Rekuperator Awaria Wentylatora Nawiewu", "address": 8222, "input_type": "holding", "device_class": "problem"},
-    {"name": "Rekuperator Awaria Wentylatora Wywiewu", "address": 8223, "input_type": "holding", "device_class": "problem"},
+    {"name": "Rekuperator Alarm", "register": registers.ALARM, "device_class": "problem"},
+    {"name": "Rekuperator Awaria CF Nawiewu", "register": registers.AWARIA_CF_NAWIEW, "device_class": "problem"},
+    {"name": "Rekuperator Awaria CF Wywiewu", "register": registers.AWARIA_CF_WYWIEW, "device_class": "problem"},
+    {"name": "Rekuperator Awaria Wentylatora Nawiewu", "register": registers.AWARIA_WENT_NAWIEW, "device_class": "problem"},
+    {"name": "Rekuperator Awaria Wentylatora Wywiewu", "register": registers.AWARIA_WENT_WYWIEW, "device_class": "problem"},
 
     # BYPASS: tutaj wartość 0 oznacza "ON" (otwarty) – odwracamy logikę przez on_value=0
-    {"name": "Rekuperator Bypass", "address": 4320, "input_type": "holding", "on_value": 0, "icon_on": "mdi:valve-open", "icon_off": "mdi:valve-closed"},
-
-    {"name": "Rekuperator Error", "address": 8193, "input_type": "holding", "device_class": "problem"},
-    {"name": "Rekuperator fpx flaga", "address": 4192, "input_type": "holding", "icon_on": "mdi:flag", "icon_off": "mdi:flag-outline"},
-    {"name": "Rekuperator FPX tryb", "address": 4198, "input_type": "holding", "icon_on": "mdi:fan-alert", "icon_off": "mdi:fan"},
-    {"name": "Rekuperator FPX zabezpieczenie termiczne", "address": 8208, "input_type": "holding", "device_class": "safety"},
-    {"name": "Rekuperator lato zima", "address": 4209, "input_type": "holding", "icon_on": "mdi:sun-thermometer", "icon_off": "mdi:snowflake"},
-    {"name": "Rekuperator Wymiana Filtrów", "address": 8444, "input_type": "holding", "icon_on": "mdi:air-filter", "icon_off": "mdi:fan-alert"},
-    {"name": "Rekuperator Status ERV", "address": 4704, "input_type": "holding", "on_value": 0, "icon_on": "mdi:radiator", "icon_off": "mdi:radiator-off"},
+    {"name": "Rekuperator Bypass", "register": registers.BYPASS, "on_value": 0, "icon_on": "mdi:valve-open", "icon_off": "mdi:valve-closed"},
+
+    {"name": "Rekuperator Error", "register": registers.ERROR, "device_class": "problem"},
+    {"name": "Rekuperator fpx flaga", "register": registers.FPX_FLAGA, "icon_on": "mdi:flag", "icon_off": "mdi:flag-outline"},
+    {"name": "Rekuperator FPX tryb", "register": registers.FPX_TRYB, "icon_on": "mdi:fan-alert", "icon_off": "mdi:fan"},
+    {"name": "Rekuperator FPX zabezpieczenie termiczne", "register": registers.FPX_ZABEZPIECZENIE, "device_class": "safety"},
+    {"name": "Rekuperator lato zima", "register": registers.SEZON, "icon_on": "mdi:sun-thermometer", "icon_off": "mdi:snowflake"},
+    {"name": "Rekuperator Wymiana Filtrów", "register": registers.WYMIANA_FILTROW, "icon_on": "mdi:air-filter", "icon_off": "mdi:fan-alert"},
+    {"name": "Rekuperator Status ERV", "register": registers.STATUS_ERV, "on_value": 0, "icon_on": "mdi:radiator", "icon_off": "mdi:radiator-off"},
 ]
 
 async def async_setup_entry(
@@ -60,8 +63,7 @@ class ModbusBinarySensor(BinarySensorEntity):
         self,
         coordinator: ThesslaGreenCoordinator,
         name: str,
-        address: int,
-        input_type: str = "coil",
+        register: RegisterDef,
         slave: int = 1,
         device_class: str | None = None,
         icon_on: str | None = None,
@@ -70,8 +72,8 @@ class ModbusBinarySensor(BinarySensorEntity):
     ):
         self.coordinator = coordinator
         self._attr_name = name
-        self._address = address
-        self._input_type = input_type
+        self._address = register.address
+        self._input_type = register.kind
         self._slave = slave
         self._icon_on = icon_on
         self._icon_off = icon_off
@@ -79,7 +81,7 @@ class ModbusBinarySensor(BinarySensorEntity):
         # Jeśli nie podano, przyjmij standard: 1 = ON
         self._on_value = 1 if on_value is None else on_value
 
-        self._attr_unique_id = f"thessla_binary_sensor_{slave}_{address}"
+        self._attr_unique_id = f"thessla_binary_sensor_{slave}_{register.address}"
         self._attr_device_class = device_class
 
         self._attr_device_info = {
@@ -91,7 +93,7 @@ class ModbusBinarySensor(BinarySensorEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([(self._input_type, self._address)])
 
     @property
     def is_on(self) -> bool | None:
@@ -121,10 +123,17 @@ class ModbusBinarySensor(BinarySensorEntity):
             return None
         return self._icon_on if self.is_on else self._icon_off
 
+    @property
+    def extra_state_attributes(self):
+        # Wartość z migawki zapisanej przed restartem – do pierwszego odczytu z urządzenia
+        return {"restored": True} if self.coordinator.safe_data.restored else None
+
     async def async_update(self):
         """No manual polling needed — coordinator handles data updates."""
         pass
 
     async def async_added_to_hass(self):
         """Register entity with coordinator updates."""
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self.async_write_ha_state, [(self._input_type, self._address)]
+        ))
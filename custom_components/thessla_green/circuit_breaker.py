@@ -0,0 +1,102 @@
+"""Bezpiecznik (circuit breaker) połączenia Modbus z wykładniczym, losowanym odstępem prób."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_DELAY = 5.0
+DEFAULT_MAX_DELAY = 300.0
+
+# Próba, która nie zakończyła się w tym czasie (np. anulowane zadanie), nie blokuje kolejnych
+PROBE_TIMEOUT = 60.0
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures.
+
+    While open every request fails fast. When the (jittered, exponentially growing)
+    backoff expires the breaker goes half-open and lets exactly one probe through;
+    the probe result closes the breaker or reopens it with a longer delay.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        self._name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._open_count = 0
+        self._next_probe: float = 0.0
+        self._probe_in_flight = False
+        self._probe_started: float = 0.0
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and time.monotonic() >= self._next_probe:
+            return STATE_HALF_OPEN
+        return self._state
+
+    @property
+    def seconds_until_probe(self) -> float:
+        if self._state != STATE_OPEN:
+            return 0.0
+        return max(0.0, round(self._next_probe - time.monotonic(), 1))
+
+    def allow_request(self) -> bool:
+        """Czy można wysłać zapytanie; w stanie half-open przepuszcza tylko jedną próbę."""
+        if self._state == STATE_CLOSED:
+            return True
+        if self._state == STATE_OPEN:
+            if time.monotonic() < self._next_probe:
+                return False
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        now = time.monotonic()
+        if self._probe_in_flight and now - self._probe_started < PROBE_TIMEOUT:
+            return False
+        self._probe_in_flight = True
+        self._probe_started = now
+        return True
+
+    @property
+    def probing(self) -> bool:
+        return self._state == STATE_HALF_OPEN and self._probe_in_flight
+
+    def record_success(self):
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("%s: connection restored, closing circuit breaker", self._name)
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._open_count = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == STATE_HALF_OPEN or self._failures >= self._failure_threshold:
+            self._open()
+
+    def _open(self):
+        # Wykładniczy odstęp z losowością ("equal jitter"), żeby wiele urządzeń nie próbowało jednocześnie
+        delay = min(self._max_delay, self._base_delay * (2 ** self._open_count))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        self._open_count += 1
+        self._state = STATE_OPEN
+        self._probe_in_flight = False
+        self._next_probe = time.monotonic() + delay
+        _LOGGER.warning("%s: circuit breaker open, next probe in %.1f s", self._name, delay)
@@ -5,6 +5,110 @@ CONF_PORT = "port"
 CONF_SLAVE = "slave"
 CONF_SCAN_INTERVAL = "scan_interval"
 
+# Wspólne bramki Modbus (host, port) -> ModbusGateway, dzielone przez wpisy konfiguracji
+DATA_GATEWAYS = f"{DOMAIN}_gateways"
+
 DEFAULT_PORT = 8899
 DEFAULT_SLAVE = 10
-DEFAULT_SCAN_INTERVAL = 30
\ No newline at end of file
+DEFAULT_SCAN_INTERVAL = 30
+
+# Planowanie odczytów (łączenie bloków rejestrów)
+CONF_MAX_GAP = "max_gap"
+CONF_MAX_REGISTERS = "max_registers"
+
+DEFAULT_MAX_GAP = 16
+DEFAULT_MAX_REGISTERS = 64
+
+# Grupy odpytywania (tiers) – każdy rejestr czytany jest z interwałem swojej grupy
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_SLOW = "slow"
+TIERS = (TIER_FAST, TIER_NORMAL, TIER_SLOW)
+
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+
+DEFAULT_FAST_SCAN_INTERVAL = 10
+DEFAULT_SLOW_SCAN_INTERVAL = 300
+
+# Równoległe (potokowe) odczyty – liczba zapytań "w locie"; 1 = odczyt sekwencyjny
+CONF_PIPELINE_WINDOW = "pipeline_window"
+
+DEFAULT_PIPELINE_WINDOW = 1
+
+# Kolejka zapisów – zapisy w tym oknie (s) są łączone, liczy się ostatnia wartość
+CONF_WRITE_DEBOUNCE = "write_debounce"
+
+DEFAULT_WRITE_DEBOUNCE = 0.3
+
+# Weryfikacja zapisu odczytem zwrotnym – pierwsza przerwa (s, rośnie x2) i limit czasu (s)
+CONF_VERIFY_BACKOFF = "verify_backoff"
+CONF_VERIFY_TIMEOUT = "verify_timeout"
+
+DEFAULT_VERIFY_BACKOFF = 0.2
+DEFAULT_VERIFY_TIMEOUT = 3.0
+
+# Dostępność encji: rejestr jest nieaktualny, gdy od ostatniego udanego odczytu minęło więcej
+# niż max(stale_after, 2 × interwał jego grupy) sekund
+CONF_STALE_AFTER = "stale_after"
+
+DEFAULT_STALE_AFTER = 90
+
+# Tryb "burst": po zapisie i przy pojawieniu się alarmu rejestry przejściowe czytane są co burst_interval
+# sekund przez burst_duration sekund (0 = wyłączone)
+CONF_BURST_INTERVAL = "burst_interval"
+CONF_BURST_DURATION = "burst_duration"
+
+DEFAULT_BURST_INTERVAL = 2
+DEFAULT_BURST_DURATION = 30
+
+# Limity czasu: pojedyncze zapytanie (s) i cały cykl odczytu (s, 0 = 80% bieżącego interwału);
+# bloki, które nie zmieściły się w budżecie, są czytane na początku następnego cyklu
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_CYCLE_BUDGET = "cycle_budget"
+
+DEFAULT_REQUEST_TIMEOUT = 3.0
+DEFAULT_CYCLE_BUDGET = 0
+
+# Historia odczytów w pamięci – liczba ostatnich próbek na rejestr (0 = wyłączona)
+CONF_HISTORY_DEPTH = "history_depth"
+
+DEFAULT_HISTORY_DEPTH = 720
+
+SERVICE_GET_HISTORY = "get_history"
+
+# Wielkości liczone (sprawność, moc odzysku) – opcjonalne wygładzanie: EMA albo mediana z N ostatnich próbek
+CONF_DERIVED_SMOOTHING = "derived_smoothing"
+CONF_DERIVED_WINDOW = "derived_window"
+
+SMOOTHING_NONE = "none"
+SMOOTHING_EMA = "ema"
+SMOOTHING_MEDIAN = "median"
+SMOOTHING_MODES = (SMOOTHING_NONE, SMOOTHING_EMA, SMOOTHING_MEDIAN)
+
+DEFAULT_DERIVED_SMOOTHING = SMOOTHING_NONE
+DEFAULT_DERIVED_WINDOW = 5
+
+# Histereza publikowanej wartości (% i kW) oraz minimalna różnica wywiew - czerpnia (°C) dla sprawności
+EFFICIENCY_HYSTERESIS = 0.5
+RECOVERY_POWER_HYSTERESIS = 0.005
+EFFICIENCY_MIN_DELTA = 0.5
+
+# Energia odzysku: przerwa w danych (s), przez którą nie całkujemy, i minimalny odstęp zapisów stanu (s)
+ENERGY_MAX_GAP = 600
+ENERGY_WRITE_INTERVAL = 300
+
+# Godzinowe statystyki długoterminowe wielkości liczonych (API statystyk zewnętrznych rekordera)
+CONF_LONG_TERM_STATISTICS = "long_term_statistics"
+
+DEFAULT_LONG_TERM_STATISTICS = True
+
+# COP przeliczany najwyżej co tyle sekund, z mocą uśrednioną w czasie z całego okna (0 = przy każdej zmianie)
+CONF_COP_INTERVAL = "cop_interval"
+
+DEFAULT_COP_INTERVAL = 30
+
+# Ostatni dobry obraz rejestrów w magazynie HA – encje startują z niego, zanim odpowie centrala.
+# Zapis najwyżej co SNAPSHOT_SAVE_INTERVAL sekund (i przy wyładowaniu wpisu)
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_INTERVAL = 300
@@ -1,31 +1,340 @@
 import logging
+import time
+from dataclasses import replace
 from datetime import timedelta
+from typing import Callable, Iterable
 
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN
-from .modbus_controller import ThesslaGreenModbusController, ControllerData
+from .const import (
+    DOMAIN,
+    DEFAULT_BURST_DURATION,
+    DEFAULT_BURST_INTERVAL,
+    DEFAULT_DERIVED_SMOOTHING,
+    DEFAULT_DERIVED_WINDOW,
+    DEFAULT_HISTORY_DEPTH,
+    DEFAULT_LONG_TERM_STATISTICS,
+    DEFAULT_STALE_AFTER,
+    SNAPSHOT_SAVE_INTERVAL,
+    TIER_FAST,
+    TIER_NORMAL,
+    TIER_SLOW,
+)
+from .derived import DerivedData, DerivedMetricsEngine
+from .history import RegisterHistory
+from .long_term_statistics import LongTermStatistics
+from .registers import ALARM, ERROR
+from .modbus_controller import ThesslaGreenModbusController, ControllerData, WriteResult
 
 _LOGGER = logging.getLogger(__name__)
 
+# Wspólna pusta migawka zwracana, zanim pojawią się pierwsze dane
+EMPTY_DATA = ControllerData()
+
+
+@callback
+def _keep_schedule() -> None:
+    """Listener bez działania – encje rejestrów powiadamiane są osobno."""
+
 
 class ThesslaGreenCoordinator(DataUpdateCoordinator[ControllerData]):
 
-    def __init__(self, hass, controller: ThesslaGreenModbusController, scan_interval: int):
+    def __init__(
+        self,
+        hass,
+        controller: ThesslaGreenModbusController,
+        scan_interval: int,
+        fast_scan_interval: int | None = None,
+        slow_scan_interval: int | None = None,
+        stale_after: int = DEFAULT_STALE_AFTER,
+        burst_interval: int = DEFAULT_BURST_INTERVAL,
+        burst_duration: int = DEFAULT_BURST_DURATION,
+        cycle_budget: float = 0,
+        history_depth: int = DEFAULT_HISTORY_DEPTH,
+        derived_smoothing: str = DEFAULT_DERIVED_SMOOTHING,
+        derived_window: int = DEFAULT_DERIVED_WINDOW,
+        long_term_statistics: bool = DEFAULT_LONG_TERM_STATISTICS,
+        snapshot_store: Store | None = None,
+    ):
+        # Interwał każdej grupy; koordynator "tyka" z interwałem najszybszej z nich
+        self._tier_intervals = {
+            TIER_FAST: fast_scan_interval or scan_interval,
+            TIER_NORMAL: scan_interval,
+            TIER_SLOW: slow_scan_interval or scan_interval,
+        }
+        self._tick = min(self._tier_intervals.values())
+        self._tier_last_read: dict[str, float] = {}
+        self._stale_after = stale_after
+
+        # Tryb burst: krótki interwał przez ograniczony czas po zapisie lub pojawieniu się alarmu
+        self._burst_interval = min(burst_interval, self._tick)
+        self._burst_duration = burst_duration
+        self._burst_until: float = 0.0
+        self._alarm_active = False
+
+        # Budżet czasu cyklu odczytu; 0 = 80% bieżącego interwału (także skróconego w trybie burst)
+        self._cycle_budget = cycle_budget
+
         super().__init__(
             hass=hass,
             logger=_LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=scan_interval),
+            update_interval=timedelta(seconds=self._tick),
         )
         self.controller = controller
+        # Ostatnie odczyty każdego rejestru (wartości fizyczne) – trendy bez zapytań do bazy
+        self.history = RegisterHistory(history_depth, controller.register_defs)
+        # Sprawność i moc odzysku liczone raz na cykl – sensory tylko publikują wynik
+        self._derived = DerivedMetricsEngine(derived_smoothing, derived_window)
+        # Godzinowe agregaty trafiają do rekordera paczką po zakończeniu każdej godziny
+        self._statistics = LongTermStatistics(hass, controller.slave, long_term_statistics)
+
+        # Migawka rejestrów z poprzedniego uruchomienia – encje są dostępne do końca pierwszego odczytu
+        self._snapshot_store = snapshot_store
+        self._snapshot_saved = float("-inf")
+        self._restored = False
+        controller.set_write_listener(self._handle_writes_flushed)
+
+        # Stan z ostatniego powiadomienia encji – do wykrywania zmienionych rejestrów
+        self._notified_data: ControllerData | None = None
+        self._notified_success: bool | None = None
+        self._notified_fresh: dict[tuple[str, int], bool] = {}
+        # Encje powiadamiane tylko przy zmianie swoich rejestrów: klucz -> (callback, rejestry)
+        self._register_listeners: dict[object, tuple[CALLBACK_TYPE, frozenset[tuple[str, int]]]] = {}
+
+    def _due_tiers(self) -> set[str]:
+        now = time.monotonic()
+        # Pół "tyknięcia" zapasu, żeby drobne opóźnienia harmonogramu nie przesuwały odczytu o cały cykl
+        slack = self._tick / 2
+        return {
+            tier
+            for tier, interval in self._tier_intervals.items()
+            if now - self._tier_last_read.get(tier, float("-inf")) >= interval - slack
+        }
+
+    @property
+    def bursting(self) -> bool:
+        return time.monotonic() < self._burst_until
+
+    def _arm_burst(self, reason: str) -> bool:
+        if not self._burst_duration:
+            return False
+        if not self.bursting:
+            _LOGGER.debug("Burst polling every %d s for %d s (%s)", self._burst_interval, self._burst_duration, reason)
+        self._burst_until = time.monotonic() + self._burst_duration
+        self.update_interval = timedelta(seconds=self._burst_interval)
+        return True
+
+    @callback
+    def async_start_burst(self, reason: str):
+        """Włącza szybkie odpytywanie rejestrów przejściowych na ``burst_duration`` sekund."""
+        if self._arm_burst(reason):
+            # Następny odczyt już za burst_interval, a nie dopiero przy zaplanowanym cyklu
+            self._schedule_refresh()
+
+    @callback
+    def async_restore_snapshot(self, snapshot: dict) -> bool:
+        """Ustawia dane z zapisanej migawki; pierwszy prawdziwy odczyt wykonuje się w tle."""
+        self._statistics.restore(snapshot.get("statistics", {}), time.time())
+        data = self.controller.restore_registers(snapshot)
+        if not (data.holding or data.input or data.coil):
+            return False
+        self._restored = True
+        self.data = data
+        self._derived.update(data)
+        _LOGGER.info(
+            "Slave %d: restored %d registers saved at %s",
+            self.controller.slave, len(data.holding) + len(data.input) + len(data.coil),
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.get("saved", 0))),
+        )
+        return True
+
+    def _snapshot(self) -> dict:
+        # Godzina statystyk w toku trafia do migawki, żeby restart jej nie gubił
+        return {
+            "saved": time.time(),
+            **self.controller.export_registers(),
+            "statistics": self._statistics.export(),
+        }
+
+    @property
+    def snapshot_store(self) -> Store | None:
+        return self._snapshot_store
+
+    async def async_save_snapshot(self):
+        if self._snapshot_store is not None and self.data is not None and not self._restored:
+            await self._snapshot_store.async_save(self._snapshot())
 
     async def _async_update_data(self):
+        tiers = self._due_tiers()
+        burst = self.bursting
         try:
-            return await self.controller.fetch_data()
+            data = await self.controller.fetch_data(
+                tiers, burst=burst, budget=self._cycle_budget or 0.8 * self.update_interval.total_seconds()
+            )
         except Exception as error:
             raise UpdateFailed(error)
+        finally:
+            # Po pierwszej próbie odczytu dostępność wynika już z prawdziwych czasów odczytu
+            self._restored = False
+
+        # Zapis migawki ograniczony czasowo – magazyn HA zapisuje plik w tle
+        now = time.monotonic()
+        if self._snapshot_store is not None and now - self._snapshot_saved >= SNAPSHOT_SAVE_INTERVAL:
+            self._snapshot_saved = now
+            self._snapshot_store.async_delay_save(self._snapshot, 1)
+
+        # Alarm/błąd, który właśnie się pojawił, uruchamia burst (jednorazowo – nie przez cały czas trwania alarmu)
+        alarm = any(data.holding.get(register.address) for register in (ALARM, ERROR))
+        if alarm and not self._alarm_active:
+            self._arm_burst("alarm")
+        self._alarm_active = alarm
+        if not self.bursting and self.update_interval != timedelta(seconds=self._tick):
+            _LOGGER.debug("Burst polling finished")
+            self.update_interval = timedelta(seconds=self._tick)
+
+        self.history.record(data)
+        previous = self._derived.data
+        derived = self._derived.update(data)
+        if derived is not previous and derived.stamp is not None:
+            self._statistics.async_add(derived, derived.stamp)
+
+        now = time.monotonic()
+        for tier in tiers:
+            self._tier_last_read[tier] = now
+
+        # Zapisane rejestry zawsze są czytane w następnym cyklu – nowszy odczyt potwierdza albo cofa wartość,
+        # a gdy blok rejestru się nie powiódł, wartość zapisana zostaje jako niepotwierdzona do kolejnego cyklu
+        if self.data and self.data.unconfirmed:
+            data = data.with_unconfirmed(self.data)
+            for address in self.data.unconfirmed - data.unconfirmed:
+                if data.holding.get(address) != self.data.holding.get(address):
+                    _LOGGER.warning(
+                        "Register %d was not confirmed by the device (written %s, read %s)",
+                        address, self.data.holding.get(address), data.holding.get(address),
+                    )
+        return data
+
+    async def async_write_register(self, address: int, value: int, verify: bool = False) -> WriteResult:
+        """Zapis przez kolejkę kontrolera; po wysłaniu paczki wartości od razu trafiają do encji.
+
+        Z ``verify=True`` kontroler odczytuje zwrotnie tylko zapisany rejestr zamiast pełnego cyklu.
+        """
+        result = await self.controller.queue_write(address, value, verify=verify)
+        # Centrala zmienia przepływy i siłowniki przez kilka sekund po zapisie – śledzimy to w trybie burst
+        self.async_start_burst(f"write to register {address}")
+        return result
+
+    @callback
+    def _handle_writes_flushed(self, values: dict[int, int], confirmed: bool):
+        """Nanosi zapisane (lub odczytane zwrotnie) wartości na bieżące dane, bez pełnego cyklu odczytu.
+
+        Nie używamy async_set_updated_data, żeby nie przesuwać harmonogramu odpytywania –
+        niepotwierdzone wartości potwierdzi albo cofnie najbliższy zaplanowany odczyt.
+        """
+        if self.data is None:
+            self.hass.async_create_task(self.async_request_refresh())
+            return
+        if confirmed:
+            unconfirmed = self.data.unconfirmed - frozenset(values)
+        else:
+            unconfirmed = self.data.unconfirmed | frozenset(values)
+        self.data = replace(
+            self.data,
+            holding=self.data.holding.with_values(values, stamp=time.time() if confirmed else None),
+            unconfirmed=unconfirmed,
+        )
+        self.async_update_listeners()
+
+    @callback
+    def async_add_register_listener(
+        self, update_callback: CALLBACK_TYPE, registers: Iterable[tuple[str, int]]
+    ) -> Callable[[], None]:
+        """Listener wywoływany tylko, gdy zmienił się któryś z podanych rejestrów (typ, adres)."""
+        key = object()
+        self._register_listeners[key] = (update_callback, frozenset(registers))
+        # Pusty listener koordynatora podtrzymuje harmonogram odświeżania, dopóki istnieje jakaś encja
+        remove_schedule = self.async_add_listener(_keep_schedule)
+
+        @callback
+        def remove_listener() -> None:
+            self._register_listeners.pop(key, None)
+            remove_schedule()
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Powiadamia tylko encje, których rejestry zmieniły wartość albo aktualność.
+
+        Zwykłe listenery koordynatora (diagnostyka) oraz wszystkie encje przy zmianie dostępności
+        koordynatora są powiadamiane zawsze.
+        """
+        super().async_update_listeners()
+        data, previous = self.data, self._notified_data
+        notify_all = (
+            data is None
+            or previous is None
+            or self.last_update_success != self._notified_success
+            # Koniec danych z migawki – encje zdejmują atrybut "restored"
+            or data.restored != previous.restored
+        )
+        self._notified_data = data
+        self._notified_success = self.last_update_success
+        changed = set() if notify_all else data.changed_registers(previous)
+
+        # Rejestry, które właśnie stały się nieaktualne (lub znów aktualne) – zmienia się dostępność encji
+        watched = set().union(*(r for _, r in self._register_listeners.values()))
+        fresh = {register: self.registers_fresh([register]) for register in watched}
+        changed |= {r for r, ok in fresh.items() if self._notified_fresh.get(r) != ok}
+        self._notified_fresh = fresh
+
+        for update_callback, registers in list(self._register_listeners.values()):
+            if notify_all or not registers.isdisjoint(changed):
+                update_callback()
+
+    def registers_fresh(self, registers: Iterable[tuple[str, int]]) -> bool:
+        """True, gdy wszystkie podane rejestry mają ostatni udany odczyt w granicy aktualności."""
+        data = self.data
+        if data is None:
+            return False
+        now = time.time()
+        for kind, address in registers:
+            stamp = getattr(data, kind).timestamp(address)
+            if self._restored:
+                if stamp is None:
+                    return False
+                continue
+            tier_interval = self._tier_intervals[self.controller.tier_of(kind, address)]
+            if stamp is None or now - stamp > max(self._stale_after, 2 * tier_interval):
+                return False
+        return True
+
+    def is_unconfirmed(self, address: int) -> bool:
+        return address in self.safe_data.unconfirmed
+
+    def register_attributes(self, address: int) -> dict:
+        """Atrybuty encji sterujących rejestrem holding: status zapisu i znacznik danych z migawki."""
+        attributes = {"unconfirmed": self.is_unconfirmed(address)}
+        if self.safe_data.restored:
+            attributes["restored"] = True
+        return attributes
+
+    @property
+    def derived(self) -> DerivedData:
+        return self._derived.data
+
+    @callback
+    def async_record_statistic(self, metric: str, value: float | None):
+        """Dodaje próbkę metryki liczonej przez encję (np. COP) do statystyk długoterminowych."""
+        self._statistics.async_add_value(metric, value, time.time())
+
+    def restore_recovered_energy(self, total: float):
+        self._derived.energy.restore(total)
+        self._derived.data = replace(self._derived.data, recovered_energy=self._derived.energy.total)
 
     @property
     def safe_data(self) -> ControllerData:
-        return self.data or ControllerData()
+        return self.data or EMPTY_DATA
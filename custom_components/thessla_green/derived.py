@@ -0,0 +1,220 @@
+"""Wielkości liczone (sprawność, moc odzysku, COP) – wyliczane raz na migawkę, wspólnie dla wszystkich encji."""
+from __future__ import annotations
+
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque
+
+from .const import (
+    DEFAULT_DERIVED_SMOOTHING,
+    DEFAULT_DERIVED_WINDOW,
+    EFFICIENCY_HYSTERESIS,
+    EFFICIENCY_MIN_DELTA,
+    ENERGY_MAX_GAP,
+    RECOVERY_POWER_HYSTERESIS,
+    SMOOTHING_EMA,
+    SMOOTHING_MEDIAN,
+)
+from .registers import STRUMIEN_NAWIEW, STRUMIEN_WYWIEW, TEMP_CZERPNIA, TEMP_NAWIEW, TEMP_WYWIEW
+
+# Moc odzysku [kW] ≈ 0.000335 * V[m3/h] * ΔT[°C] (ciepło właściwe i gęstość powietrza)
+AIR_HEAT_FACTOR = 0.000335
+
+INPUTS = (TEMP_CZERPNIA, TEMP_NAWIEW, TEMP_WYWIEW, STRUMIEN_NAWIEW, STRUMIEN_WYWIEW)
+
+
+@dataclass(frozen=True)
+class DerivedData:
+    temp_outdoor: float | None = None
+    temp_supply: float | None = None
+    temp_extract: float | None = None
+    flow_supply: float | None = None
+    flow_extract: float | None = None
+    # Przyrost temperatury na odzysku (nawiew - czerpnia) i różnica dostępna (wywiew - czerpnia)
+    delta_t: float | None = None
+    delta_available: float | None = None
+    efficiency: float | None = None
+    recovery_power: float | None = None
+    # Energia odzysku narastająco [kWh] (całkowana z mocy bez wygładzania)
+    recovered_energy: float = 0.0
+    # Czas (time.time()) najnowszego odczytu rejestrów wejściowych
+    stamp: float | None = None
+
+    def cop(self, power_kw: float | None) -> float | None:
+        """COP = moc odzysku / pobór elektryczny; None, gdy któraś wielkość jest niedostępna."""
+        if self.recovery_power is None or self.recovery_power <= 0 or power_kw is None or power_kw <= 0:
+            return None
+        return round(self.recovery_power / power_kw, 2)
+
+
+class Smoother:
+    """Optional EMA or running-median filter followed by a hysteresis on the published value.
+
+    With ``hysteresis`` the output only moves once the filtered value differs from the last
+    published one by at least that much, so small oscillations do not produce new states.
+    """
+
+    def __init__(self, mode: str | None, window: int, hysteresis: float = 0.0):
+        self._mode = mode
+        self._window: Deque[float] = deque(maxlen=max(1, window))
+        self._alpha = 2 / (max(1, window) + 1)
+        self._ema: float | None = None
+        self._hysteresis = hysteresis
+        self._published: float | None = None
+
+    def reset(self):
+        self._window.clear()
+        self._ema = None
+        self._published = None
+
+    def update(self, value: float | None) -> float | None:
+        if value is None:
+            # Przerwa w danych – filtr startuje od nowa, żeby nie łączyć odległych próbek
+            self.reset()
+            return None
+        if self._mode == SMOOTHING_EMA:
+            self._ema = value if self._ema is None else self._ema + self._alpha * (value - self._ema)
+            value = self._ema
+        elif self._mode == SMOOTHING_MEDIAN:
+            self._window.append(value)
+            value = statistics.median(self._window)
+        if self._published is None or abs(value - self._published) >= self._hysteresis:
+            self._published = value
+        return self._published
+
+
+class TimeWeightedAverage:
+    """Time-weighted mean of a step signal (e.g. power samples from another entity) between reads.
+
+    Each sample holds until the next one; ``take()`` returns the mean since the previous
+    ``take()`` and starts a new window with the last known value.
+    """
+
+    def __init__(self):
+        self._area = 0.0
+        self._duration = 0.0
+        self._last: tuple[float, float] | None = None
+        self.samples = 0
+
+    def add(self, stamp: float, value: float | None):
+        self._advance(stamp)
+        self._last = None if value is None else (stamp, value)
+        self.samples += 1
+
+    def _advance(self, stamp: float):
+        if self._last is not None:
+            last_stamp, last_value = self._last
+            dt = max(0.0, stamp - last_stamp)
+            self._area += last_value * dt
+            self._duration += dt
+            self._last = (stamp, last_value)
+
+    def take(self, stamp: float) -> float | None:
+        self._advance(stamp)
+        if self._duration > 0:
+            mean = self._area / self._duration
+        else:
+            mean = None if self._last is None else self._last[1]
+        self._area = self._duration = 0.0
+        self.samples = 0
+        return mean
+
+
+class EnergyIntegrator:
+    """Trapezoidal integral of power [kW] over the register read timestamps, in kWh.
+
+    Only positive power (heat recovered) is counted, so the total never decreases; a gap
+    longer than ``ENERGY_MAX_GAP`` (no data, unit offline) is skipped instead of bridged.
+    """
+
+    def __init__(self):
+        # Energia zebrana od startu i stan sprzed restartu (przyjmowany tylko raz)
+        self._accumulated = 0.0
+        self._restored: float | None = None
+        self._last: tuple[float, float] | None = None
+
+    @property
+    def total(self) -> float:
+        return (self._restored or 0.0) + self._accumulated
+
+    def restore(self, total: float):
+        """Przyjmuje stan sprzed restartu; kolejne wywołania (np. ponowne dodanie encji) są ignorowane."""
+        if self._restored is None:
+            self._restored = max(0.0, total)
+
+    def add(self, stamp: float | None, power_kw: float | None):
+        if stamp is None or power_kw is None:
+            self._last = None
+            return
+        power_kw = max(0.0, power_kw)
+        if self._last is not None:
+            last_stamp, last_power = self._last
+            dt = stamp - last_stamp
+            if dt <= 0:
+                return
+            if dt <= ENERGY_MAX_GAP:
+                self._accumulated += (last_power + power_kw) / 2 * dt / 3600
+        self._last = (stamp, power_kw)
+
+
+class DerivedMetricsEngine:
+    """Computes temperatures, ΔT, efficiency and recovery power once per coordinator update.
+
+    Filters only advance when one of the input registers was actually read again, so a
+    cycle that did not touch them (e.g. a slow-tier-only refresh) does not skew the average.
+    """
+
+    def __init__(self, smoothing: str | None = DEFAULT_DERIVED_SMOOTHING, window: int = DEFAULT_DERIVED_WINDOW):
+        self._efficiency = Smoother(smoothing, window, EFFICIENCY_HYSTERESIS)
+        self._recovery_power = Smoother(smoothing, window, RECOVERY_POWER_HYSTERESIS)
+        self._stamps: tuple = ()
+        # Sprawność przy małej różnicy temperatur jest niestabilna – wyłączana poniżej progu,
+        # przywracana dopiero przy dwukrotnie większej różnicy
+        self._efficiency_enabled = True
+        self.energy = EnergyIntegrator()
+        self.data = DerivedData()
+
+    def update(self, data) -> DerivedData:
+        stamps = tuple(getattr(data, r.kind).timestamp(r.address) for r in INPUTS)
+        if stamps == self._stamps:
+            return self.data
+        self._stamps = stamps
+
+        to, ts, te, flow, flow_extract = (r.decode(getattr(data, r.kind).get(r.address)) for r in INPUTS)
+        to, ts, te = (None if t is None else round(t, 1) for t in (to, ts, te))
+        flow, flow_extract = (None if f is None else float(f) for f in (flow, flow_extract))
+
+        delta_t = None if None in (to, ts) else round(ts - to, 1)
+        delta_available = None if None in (to, te) else round(te - to, 1)
+
+        efficiency = None
+        if delta_available is not None and delta_t is not None:
+            threshold = EFFICIENCY_MIN_DELTA * (1 if self._efficiency_enabled else 2)
+            self._efficiency_enabled = abs(delta_available) >= threshold
+            if self._efficiency_enabled:
+                efficiency = delta_t / delta_available * 100.0
+        efficiency = self._efficiency.update(efficiency)
+
+        recovery_power = None
+        if delta_t is not None and flow is not None and flow > 0:
+            recovery_power = AIR_HEAT_FACTOR * flow * delta_t
+        # Czas próbki = najnowszy odczyt temperatur/przepływu (czas z fetch_data, nie czas cyklu)
+        stamp = max((s for s in stamps if s is not None), default=None)
+        self.energy.add(stamp, recovery_power)
+        recovery_power = self._recovery_power.update(recovery_power)
+
+        self.data = DerivedData(
+            temp_outdoor=to,
+            temp_supply=ts,
+            temp_extract=te,
+            flow_supply=flow,
+            flow_extract=flow_extract,
+            delta_t=delta_t,
+            delta_available=delta_available,
+            efficiency=None if efficiency is None else round(efficiency, 1),
+            recovery_power=None if recovery_power is None else round(recovery_power, 3),
+            recovered_energy=self.energy.total,
+            stamp=stamp,
+        )
+        return self.data
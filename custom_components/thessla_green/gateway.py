@@ -0,0 +1,165 @@
+"""Wspólne połączenie Modbus TCP dla wszystkich urządzeń (slave) za jedną bramką host:port."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+from pymodbus.client import AsyncModbusTcpClient
+
+from .circuit_breaker import STATE_CLOSED
+from .const import DATA_GATEWAYS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ModbusGateway:
+    """TCP connections and one bus scheduler shared by every controller on a gateway.
+
+    Controllers take a bus slot for each single request, never for a whole poll cycle,
+    so the poll plans of several slaves are interleaved request by request in FIFO order
+    instead of colliding on the RS485 side. The number of slots is the largest
+    pipeline window of the attached controllers (1 = strictly serial bus).
+
+    pymodbus sends one request at a time per client, so every slot gets its own
+    connection: ``client`` is used whenever it is idle, additional connections are
+    opened on first use and only while more than one request is in flight.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.client = self._new_client()
+        self._clients: List[AsyncModbusTcpClient] = [self.client]
+        self._idle: List[AsyncModbusTcpClient] = [self.client]
+        self._connect_lock = asyncio.Lock()
+        # Kolejka FIFO oczekujących na magistralę – zwolnione miejsce przechodzi na pierwszego w kolejce
+        self._waiters: deque[asyncio.Future] = deque()
+        self._in_flight = 0
+        self._max_in_flight = 1
+        self._controllers: dict[object, int] = {}
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @property
+    def in_use(self) -> bool:
+        return bool(self._controllers)
+
+    @property
+    def connections(self) -> int:
+        return sum(1 for client in self._clients if client.connected)
+
+    def _new_client(self) -> AsyncModbusTcpClient:
+        return AsyncModbusTcpClient(
+            host=self.host,
+            port=self.port,
+            reconnect_delay=1,
+            reconnect_delay_max=300,
+            # Mało powtórzeń na poziomie klienta – dłuższe awarie obsługuje bezpiecznik kontrolera
+            retries=2,
+        )
+
+    def _close(self):
+        for client in self._clients:
+            client.close()
+
+    def attach(self, controller, max_in_flight: int = 1):
+        self._controllers[controller] = max(1, max_in_flight)
+        self._max_in_flight = max(self._controllers.values())
+        _LOGGER.debug("Gateway %s: %d controller(s) attached", self.name, len(self._controllers))
+
+    def detach(self, controller):
+        self._controllers.pop(controller, None)
+        self._max_in_flight = max(self._controllers.values(), default=1)
+        if not self._controllers:
+            _LOGGER.info("Closing Modbus gateway connection %s", self.name)
+            self._close()
+
+    def suspend(self):
+        """Zamyka połączenie, gdy bezpieczniki wszystkich urządzeń na bramce są otwarte.
+
+        Dopóki choć jedno urządzenie odpowiada, połączenie zostaje – awaria jednego slave'a
+        nie może rozłączać pozostałych.
+        """
+        if all(controller.breaker.state != STATE_CLOSED for controller in self._controllers):
+            self._close()
+
+    async def connect(self) -> bool:
+        """Łączy (raz, nawet przy wielu równoczesnych wywołaniach); True gdy połączenie jest aktywne."""
+        async with self._connect_lock:
+            if self.client.connected:
+                return True
+            return await self.client.connect()
+
+    @asynccontextmanager
+    async def request_slot(self) -> AsyncIterator[AsyncModbusTcpClient]:
+        """Rezerwuje magistralę na czas pojedynczego zapytania (kolejność FIFO między urządzeniami).
+
+        Zwraca połączenie, którym wolno wysłać zapytanie – żadne inne zapytanie go w tym czasie nie używa.
+        """
+        if self._in_flight < self._max_in_flight and not self._waiters:
+            self._in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Miejsce zostało już przekazane – oddajemy je następnemu
+                    self._release_slot()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+        try:
+            client = self._take_client()
+            try:
+                if not client.connected:
+                    # Dodatkowe połączenie otwierane dopiero, gdy jest potrzebne (główne łączy kontroler)
+                    _LOGGER.debug("Gateway %s: opening connection %d", self.name, self._clients.index(client) + 1)
+                    await client.connect()
+                yield client
+            finally:
+                self._idle.append(client)
+        finally:
+            self._release_slot()
+
+    def _take_client(self) -> AsyncModbusTcpClient:
+        if self.client in self._idle:
+            self._idle.remove(self.client)
+            return self.client
+        if self._idle:
+            return self._idle.pop()
+        # Liczba połączeń nigdy nie przekracza liczby miejsc na magistrali
+        client = self._new_client()
+        self._clients.append(client)
+        return client
+
+    def _release_slot(self):
+        if self._in_flight <= self._max_in_flight:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._in_flight -= 1
+
+
+def async_get_gateway(hass, host: str, port: int) -> ModbusGateway:
+    """Zwraca wspólną bramkę dla host:port, tworząc ją przy pierwszym użyciu."""
+    gateways: dict[tuple[str, int], ModbusGateway] = hass.data.setdefault(DATA_GATEWAYS, {})
+    gateway = gateways.get((host, port))
+    if gateway is None:
+        gateway = gateways[(host, port)] = ModbusGateway(host, port)
+    return gateway
+
+
+def async_release_gateway(hass, gateway: ModbusGateway):
+    """Usuwa bramkę z rejestru, gdy nie jest już używana przez żaden wpis konfiguracji."""
+    gateways: dict[tuple[str, int], ModbusGateway] = hass.data.get(DATA_GATEWAYS, {})
+    if not gateway.in_use and gateways.get((gateway.host, gateway.port)) is gateway:
+        gateways.pop((gateway.host, gateway.port))
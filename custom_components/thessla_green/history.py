@@ -0,0 +1,113 @@
+"""Historia próbek rejestrów w pamięci – bufory pierścieniowe o stałym rozmiarze, bez udziału bazy danych."""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from .registers import RegisterDef
+
+
+class SampleRing:
+    """Fixed-size ring buffer of (timestamp, value) samples for one register.
+
+    Samples are kept in two ``array("d")`` buffers; the oldest sample is overwritten
+    once ``depth`` samples have been recorded.
+    """
+
+    __slots__ = ("_stamps", "_values", "_next", "_count")
+
+    def __init__(self, depth: int):
+        depth = max(1, depth)
+        self._stamps = array("d", [0.0]) * depth
+        self._values = array("d", [0.0]) * depth
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_stamp(self) -> float | None:
+        if not self._count:
+            return None
+        return self._stamps[self._next - 1]
+
+    def add(self, stamp: float, value: float):
+        self._stamps[self._next] = stamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._stamps)
+        self._count = min(self._count + 1, len(self._stamps))
+
+    def samples(self, since: float | None = None) -> List[Tuple[float, float]]:
+        """Próbki od najstarszej do najnowszej, opcjonalnie tylko z czasem >= ``since``."""
+        depth = len(self._stamps)
+        first = (self._next - self._count) % depth
+        result = []
+        for i in range(self._count):
+            idx = (first + i) % depth
+            if since is None or self._stamps[idx] >= since:
+                result.append((self._stamps[idx], self._values[idx]))
+        return result
+
+
+def summarize(samples: List[Tuple[float, float]]) -> dict:
+    """Liczba próbek, min/max/średnia i nachylenie (regresja liniowa, jednostka na minutę)."""
+    if not samples:
+        return {"count": 0, "min": None, "max": None, "mean": None, "slope_per_minute": None}
+    values = [value for _, value in samples]
+    count = len(values)
+    mean = sum(values) / count
+    slope = None
+    if count > 1:
+        t0 = samples[0][0]
+        mean_t = sum(stamp - t0 for stamp, _ in samples) / count
+        var_t = sum((stamp - t0 - mean_t) ** 2 for stamp, _ in samples)
+        if var_t > 0:
+            cov = sum((stamp - t0 - mean_t) * (value - mean) for stamp, value in samples)
+            slope = cov / var_t * 60
+    return {
+        "count": count,
+        "min": min(values),
+        "max": max(values),
+        "mean": mean,
+        "slope_per_minute": slope,
+    }
+
+
+class RegisterHistory:
+    """Decoded register samples per (kind, address), filled by the coordinator after every poll.
+
+    Only reads that actually happened are recorded: a register from a tier that was not due
+    keeps its old timestamp and is skipped, so slow registers do not fill their ring with copies.
+    """
+
+    def __init__(self, depth: int, registers: Iterable[RegisterDef]):
+        self.depth = depth
+        self._registers = tuple(registers)
+        self._rings: Dict[Tuple[str, int], SampleRing] = {}
+
+    def record(self, data) -> int:
+        """Dopisuje nowe odczyty z migawki ``ControllerData``; zwraca liczbę dodanych próbek."""
+        if self.depth <= 0:
+            return 0
+        added = 0
+        for register in self._registers:
+            image = getattr(data, register.kind)
+            stamp = image.timestamp(register.address)
+            if stamp is None:
+                continue
+            ring = self._rings.get(register.key)
+            if ring is None:
+                ring = self._rings[register.key] = SampleRing(self.depth)
+            elif stamp <= ring.last_stamp:
+                continue
+            ring.add(stamp, float(register.decode(image.get(register.address))))
+            added += 1
+        return added
+
+    def samples(self, kind: str, address: int, since: float | None = None) -> List[Tuple[float, float]]:
+        ring = self._rings.get((kind, address))
+        return ring.samples(since) if ring is not None else []
+
+    def registers(self) -> List[Tuple[str, int]]:
+        return sorted(self._rings)
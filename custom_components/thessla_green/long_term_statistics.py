@@ -0,0 +1,191 @@
+"""Statystyki długoterminowe wielkości liczonych – godzinowe średnie/min/max z pamięci, zapisywane paczkami.
+
+Wartości trafiają do rekordera przez API statystyk zewnętrznych (``thessla_green:<metryka>_<slave>``),
+więc historia zostaje, nawet gdy sensory o wysokiej częstotliwości są wykluczone z rekordera.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .derived import DerivedData
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+# Pole DerivedData (lub metryka zgłaszana z zewnątrz) -> (nazwa, jednostka, klasa jednostki do konwersji w HA)
+METRICS: Dict[str, tuple[str, str, str | None]] = {
+    "temp_outdoor": ("Temperatura Czerpnia", "°C", "temperature"),
+    "temp_supply": ("Temperatura Nawiew", "°C", "temperature"),
+    "temp_extract": ("Temperatura Wywiew", "°C", "temperature"),
+    "flow_supply": ("Strumień nawiew", "m3/h", None),
+    "flow_extract": ("Strumień wywiew", "m3/h", None),
+    "efficiency": ("Sprawność", "%", None),
+    "recovery_power": ("Moc Odzysku", "kW", "power"),
+    "cop": ("COP", "x", None),
+}
+
+# COP wymaga średniej mocy z sensora mocy wskazanego w opcjach – podaje go encja COP przez add_value()
+REPORTED_METRICS = frozenset({"cop"})
+
+
+@dataclass
+class HourBucket:
+    start: float
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: HourBucket):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class HourlyAggregator:
+    """Per-metric hourly mean/min/max buckets; completed hours wait in ``pending`` until flushed."""
+
+    def __init__(self, metrics=METRICS):
+        self._metrics = tuple(metrics)
+        self._current: Dict[str, HourBucket] = {}
+        self.pending: Dict[str, List[HourBucket]] = {metric: [] for metric in self._metrics}
+
+    def add(self, data: DerivedData, stamp: float):
+        for metric in self._metrics:
+            if metric not in REPORTED_METRICS:
+                self.add_value(metric, getattr(data, metric), stamp)
+
+    def add_value(self, metric: str, value: float | None, stamp: float):
+        if value is None or metric not in self.pending:
+            return
+        hour = stamp - stamp % HOUR
+        bucket = self._current.get(metric)
+        if bucket is not None and bucket.start != hour:
+            if bucket.start < hour:
+                self.pending[metric].append(bucket)
+            bucket = None
+        if bucket is None:
+            bucket = self._current[metric] = HourBucket(hour)
+        bucket.add(float(value))
+
+    @property
+    def has_pending(self) -> bool:
+        return any(self.pending.values())
+
+    def take_pending(self) -> Dict[str, List[HourBucket]]:
+        pending = {metric: buckets for metric, buckets in self.pending.items() if buckets}
+        self.pending = {metric: [] for metric in self._metrics}
+        return pending
+
+    def export(self) -> Dict[str, list]:
+        """Niezaimportowane godziny, łącznie z bieżącą, w postaci do zapisania w migawce."""
+        exported = {}
+        for metric in self._metrics:
+            buckets = list(self.pending[metric])
+            if metric in self._current:
+                buckets.append(self._current[metric])
+            if buckets:
+                exported[metric] = [list(astuple(bucket)) for bucket in buckets]
+        return exported
+
+    def restore(self, saved: Dict[str, list], stamp: float):
+        """Wczytuje godziny z migawki: bieżąca jest kontynuowana, zakończone czekają na import."""
+        hour = stamp - stamp % HOUR
+        for metric, buckets in saved.items():
+            if metric not in self.pending:
+                continue
+            for values in buckets:
+                bucket = HourBucket(*values)
+                if bucket.start < hour:
+                    self.pending[metric].append(bucket)
+                elif bucket.start == hour:
+                    current = self._current.get(metric)
+                    if current is None or current.start != hour:
+                        self._current[metric] = bucket
+                    else:
+                        current.merge(bucket)
+
+
+class LongTermStatistics:
+    """Feeds derived metrics into hourly buckets and imports every completed hour in one batch."""
+
+    def __init__(self, hass: HomeAssistant, slave: int, enabled: bool = True):
+        self._hass = hass
+        self._slave = slave
+        self._enabled = enabled
+        self._aggregator = HourlyAggregator()
+
+    def statistic_id(self, metric: str) -> str:
+        return f"{DOMAIN}:{metric}_{self._slave}"
+
+    def export(self) -> Dict[str, list]:
+        return self._aggregator.export() if self._enabled else {}
+
+    def restore(self, saved: Dict[str, list], stamp: float):
+        """Przywraca godzinę w toku zapisaną przed restartem – bez tego jej pierwsza część przepada."""
+        if self._enabled:
+            self._aggregator.restore(saved, stamp)
+
+    @callback
+    def async_add(self, data: DerivedData, stamp: float):
+        if not self._enabled:
+            return
+        self._aggregator.add(data, stamp)
+        if self._aggregator.has_pending:
+            self._async_flush()
+
+    @callback
+    def async_add_value(self, metric: str, value: float | None, stamp: float):
+        """Próbka metryki liczonej poza koordynatorem (``REPORTED_METRICS``)."""
+        if not self._enabled:
+            return
+        self._aggregator.add_value(metric, value, stamp)
+        if self._aggregator.has_pending:
+            self._async_flush()
+
+    @callback
+    def _async_flush(self):
+        if "recorder" not in self._hass.config.components:
+            # Bez rekordera nie ma gdzie zapisać – godziny są odrzucane, żeby nie rosła pamięć
+            self._aggregator.take_pending()
+            return
+
+        from homeassistant.components.recorder.models import StatisticMeanType
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        for metric, buckets in self._aggregator.take_pending().items():
+            name, unit, unit_class = METRICS[metric]
+            metadata = {
+                "source": DOMAIN,
+                "statistic_id": self.statistic_id(metric),
+                "name": f"Rekuperator {name} ({self._slave})",
+                "unit_of_measurement": unit,
+                "unit_class": unit_class,
+                "mean_type": StatisticMeanType.ARITHMETIC,
+                "has_sum": False,
+            }
+            statistics = [
+                {
+                    "start": datetime.fromtimestamp(bucket.start, tz=timezone.utc),
+                    "mean": bucket.total / bucket.count,
+                    "min": bucket.min,
+                    "max": bucket.max,
+                }
+                for bucket in buckets
+            ]
+            async_add_external_statistics(self._hass, metadata, statistics)
+            _LOGGER.debug("Imported %d hourly statistics for %s", len(statistics), metadata["statistic_id"])
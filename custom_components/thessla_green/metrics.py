@@ -0,0 +1,112 @@
+"""Metryki czasowe komunikacji Modbus: kroczące histogramy opóźnień i liczniki błędów."""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from typing import Dict, Tuple
+
+# Liczba ostatnich próbek, z których liczone są percentyle
+DEFAULT_WINDOW = 256
+
+FC_READ_COILS = 1
+FC_READ_HOLDING = 3
+FC_READ_INPUT = 4
+FC_WRITE_SINGLE = 6
+FC_WRITE_MULTIPLE = 16
+
+
+class RollingHistogram:
+    """Fixed-size ring buffer of samples with percentiles over the most recent ``window`` values."""
+
+    __slots__ = ("_samples", "_next", "_count")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._samples = array("d", [0.0]) * max(1, window)
+        self._next = 0
+        self._count = 0
+
+    def add(self, value: float):
+        self._samples[self._next] = value
+        self._next = (self._next + 1) % len(self._samples)
+        self._count = min(self._count + 1, len(self._samples))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def percentile(self, q: float) -> float | None:
+        """Percentyl (0–100) metodą najbliższej rangi; None, gdy brak próbek."""
+        if not self._count:
+            return None
+        ordered = sorted(self._samples[:self._count])
+        return ordered[min(self._count - 1, round(q / 100 * (self._count - 1)))]
+
+    def mean(self) -> float | None:
+        if not self._count:
+            return None
+        return sum(self._samples[:self._count]) / self._count
+
+
+class ControllerMetrics:
+    """Timings and error counts recorded by one controller.
+
+    Latencies are kept in seconds; ``summary()`` converts them to milliseconds for
+    the diagnostic sensors.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._window = window
+        self.cycle_time = RollingHistogram(window)
+        self.lock_wait = RollingHistogram(window)
+        self.bus_wait = RollingHistogram(window)
+        self.block_latency: Dict[str, RollingHistogram] = {}
+        # 1.0 = błąd, 0.0 = sukces – średnia to odsetek błędów z ostatnich zapytań
+        self.outcomes = RollingHistogram(window)
+        self.errors: Counter[Tuple[str, int]] = Counter()
+        self.requests = 0
+        self.retries = 0
+        # Cykle przerwane po wyczerpaniu budżetu czasu (część bloków przeniesiona na kolejny cykl)
+        self.overruns = 0
+
+    def record_request(self, block: str, function_code: int, latency: float, bus_wait: float, ok: bool):
+        self.requests += 1
+        self.bus_wait.add(bus_wait)
+        self.outcomes.add(0.0 if ok else 1.0)
+        if ok:
+            histogram = self.block_latency.get(block)
+            if histogram is None:
+                # Dla bloków wystarcza mniejsze okno – jest ich kilkanaście na urządzenie
+                histogram = self.block_latency[block] = RollingHistogram(max(16, self._window // 4))
+            histogram.add(latency)
+        else:
+            self.errors[(block, function_code)] += 1
+
+    @property
+    def error_rate(self) -> float | None:
+        rate = self.outcomes.mean()
+        return None if rate is None else round(rate * 100, 2)
+
+    def slowest_block(self) -> str | None:
+        p95 = {block: h.percentile(95) for block, h in self.block_latency.items() if len(h)}
+        return max(p95, key=p95.get) if p95 else None
+
+    def summary(self) -> dict:
+        """Zestawienie dla atrybutów encji diagnostycznych (ms)."""
+        def _ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            "cycle_p50_ms": _ms(self.cycle_time.percentile(50)),
+            "cycle_p95_ms": _ms(self.cycle_time.percentile(95)),
+            "lock_wait_p95_ms": _ms(self.lock_wait.percentile(95)),
+            "bus_wait_p95_ms": _ms(self.bus_wait.percentile(95)),
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "retries": self.retries,
+            "overruns": self.overruns,
+            "slowest_block": self.slowest_block(),
+            "blocks": {
+                block: {"p50_ms": _ms(h.percentile(50)), "p95_ms": _ms(h.percentile(95))}
+                for block, h in sorted(self.block_latency.items())
+            },
+            "errors": {f"{block} FC{fc}": count for (block, fc), count in sorted(self.errors.items())},
+        }
@@ -1,20 +1,118 @@
 import asyncio
 import logging
 import time
-from dataclasses import dataclass, field
-from typing import Dict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
 
 from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.pdu import ExceptionResponse
+
+from .const import (
+    DEFAULT_MAX_GAP,
+    DEFAULT_MAX_REGISTERS,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_WRITE_DEBOUNCE,
+    DEFAULT_VERIFY_BACKOFF,
+    DEFAULT_VERIFY_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    TIERS,
+    TIER_NORMAL,
+)
+from .circuit_breaker import CircuitBreaker
+from .gateway import ModbusGateway
+from .metrics import (
+    FC_READ_COILS,
+    FC_READ_HOLDING,
+    FC_READ_INPUT,
+    FC_WRITE_MULTIPLE,
+    FC_WRITE_SINGLE,
+    ControllerMetrics,
+)
+from .registers import REGISTERS, RegisterDef, burst_addresses, register_tiers, wanted_addresses
+from .register_image import EMPTY_COILS, EMPTY_REGISTERS, RegisterImage
+from .read_planner import (
+    MAX_COILS_PER_READ,
+    MAX_REGISTERS_PER_READ,
+    ReadPlanner,
+    expand_blocks,
+    split_runs,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+ILLEGAL_DATA_ADDRESS = 0x02
 
-@dataclass
+# Po tylu kolejnych cyklach z błędami w trybie potokowym wracamy na stałe do odczytu sekwencyjnego
+PIPELINE_MAX_FAILED_CYCLES = 3
+
+# Maksymalny czas (s), o jaki debounce może opóźnić zapis przy ciągłym przesuwaniu suwaka
+WRITE_MAX_DELAY = 2.0
+
+
+@dataclass(frozen=True)
 class ControllerData:
-    holding: Dict[int, int] = field(default_factory=dict)
-    input: Dict[int, int] = field(default_factory=dict)
-    coil: Dict[int, bool] = field(default_factory=dict)
+    # Niezmienne migawki obrazu rejestrów (API jak dict: .get(adres)); domyślnie wspólne puste obrazy
+    holding: RegisterImage = field(default_factory=lambda: EMPTY_REGISTERS)
+    input: RegisterImage = field(default_factory=lambda: EMPTY_REGISTERS)
+    coil: RegisterImage = field(default_factory=lambda: EMPTY_COILS)
     update_interval: float = 0.0
+    read_speedup: float = 1.0
+    pipelined: bool = False
+    # Rejestry zapisane, ale jeszcze niepotwierdzone odczytem z urządzenia
+    unconfirmed: frozenset[int] = frozenset()
+    # Bloki, których odczyt nie powiódł się w tym cyklu (zachowały poprzednie wartości)
+    failed_blocks: Tuple[str, ...] = ()
+    # Bloki przeniesione na następny cykl po wyczerpaniu budżetu czasu
+    deferred_blocks: Tuple[str, ...] = ()
+    # Dane odtworzone z zapisanej migawki (przed pierwszym odczytem z urządzenia)
+    restored: bool = False
+
+    def changed_registers(self, previous: "ControllerData") -> set[Tuple[str, int]]:
+        """Zwraca (typ, adres) rejestrów, których wartość lub status potwierdzenia się zmienił."""
+        changed: set[Tuple[str, int]] = set()
+        for kind in ("holding", "input", "coil"):
+            for address in getattr(self, kind).diff(getattr(previous, kind)):
+                changed.add((kind, address))
+        for address in self.unconfirmed ^ previous.unconfirmed:
+            changed.add(("holding", address))
+        return changed
+
+    def with_unconfirmed(self, previous: "ControllerData") -> "ControllerData":
+        """Przenosi z ``previous`` niepotwierdzone zapisy rejestrów, których ten cykl nie odczytał.
+
+        Rozstrzyga tylko nowszy odczyt rejestru – gdy jego blok się nie powiódł (albo nie był
+        w tym cyklu czytany), zostaje zapisana wartość i status niepotwierdzonej.
+        """
+        pending = {}
+        for address in previous.unconfirmed:
+            stamp, value = self.holding.timestamp(address), previous.holding.get(address)
+            if value is not None and (stamp is None or stamp <= (previous.holding.timestamp(address) or 0.0)):
+                pending[address] = value
+        if not pending:
+            return self
+        return replace(
+            self,
+            holding=self.holding.with_values(pending),
+            unconfirmed=self.unconfirmed | frozenset(pending),
+        )
+
+
+@dataclass
+class WriteResult:
+    """Wynik pojedynczego zapisu; ``verified`` = None gdy zapis nie był weryfikowany."""
+    address: int
+    value: int
+    verified: bool | None = None
+    read_value: int | None = None
+    attempts: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.verified is not False
+
+    def __bool__(self) -> bool:
+        return self.success
 
 
 class ControllerException(Exception):
@@ -22,114 +120,620 @@ class ControllerException(Exception):
         super().__init__(message)
 
 
+class CircuitOpenException(ControllerException):
+    """Bezpiecznik połączenia jest otwarty – zapytanie odrzucone bez komunikacji."""
+
+
+class IllegalAddressException(ControllerException):
+    """Urządzenie odpowiedziało wyjątkiem Modbus 0x02 (illegal data address)."""
+
+
+def _contains_any(read: tuple, addresses: set[int]) -> bool:
+    _, start, count, _ = read
+    return any(start <= address < start + count for address in addresses)
+
+
 class ThesslaGreenModbusController:
 
-    def __init__(self, host: str, port: int, slave_id: int, update_interval: int = 30):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        slave_id: int,
+        update_interval: int = 30,
+        max_gap: int = DEFAULT_MAX_GAP,
+        max_registers: int = DEFAULT_MAX_REGISTERS,
+        pipeline_window: int = DEFAULT_PIPELINE_WINDOW,
+        write_debounce: float = DEFAULT_WRITE_DEBOUNCE,
+        verify_backoff: float = DEFAULT_VERIFY_BACKOFF,
+        verify_timeout: float = DEFAULT_VERIFY_TIMEOUT,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        gateway: ModbusGateway | None = None,
+        registers: Iterable[RegisterDef] = REGISTERS,
+    ):
         self._host = host
         self._port = port
         self._slave = slave_id
         self._update_interval = update_interval
 
-        self._client = AsyncModbusTcpClient(
-            host=self._host,
-            port=self._port,
-            reconnect_delay=1,
-            reconnect_delay_max=300,
-            retries=10,
-        )
+        # Połączenie jest wspólne dla wszystkich urządzeń za tą samą bramką; bez bramki – własne
+        self._gateway = gateway or ModbusGateway(host, port)
+        self._client = self._gateway.client
+        # Blokada chroni stan tego urządzenia; dostęp do magistrali szereguje bramka, zapytanie po zapytaniu
         self._controller_lock = asyncio.Lock()
+        self._breaker = CircuitBreaker(f"Modbus {self._host}:{self._port} slave {self._slave}")
+
+        self._metrics = ControllerMetrics()
+
+        # Twardy limit czasu zapytania i termin zakończenia bieżącego cyklu (monotonic)
+        self._request_timeout = max(0.1, request_timeout)
+        self._cycle_deadline: float | None = None
+        # Adresy z bloków odłożonych po wyczerpaniu budżetu – czytane na początku następnego cyklu
+        self._deferred: Dict[str, set[int]] = {"holding": set(), "input": set(), "coil": set()}
 
         self._last_update_timestamp: float = 0
         self._last_update_interval: float = 0
 
-        self._holding_blocks = [
-            (256, 2), (4192, 2), (4198, 1), (4208, 3), (4210, 1),
-            (4224, 1), (4320, 1), (4387, 1),
-            (8192, 2), (8208, 1), (8222, 2), (8330, 2), (4704, 1), (4711, 1), (8444, 1), (4304, 2)
-        ]
-        self._input_blocks = [(16, 4), (22, 1)]
-        self._coil_blocks = [(9, 3)]
+        self._pipeline_window = max(1, pipeline_window)
+        self._gateway.attach(self, self._pipeline_window)
+        self._pipeline_failed_cycles = 0
+        self._read_speedup: float = 1.0
+        # Suma czasów od wysłania zapytania do odpowiedzi w bieżącym cyklu (bez czekania na miejsce w bramce)
+        self._wire_time: float = 0.0
+
+        # Kolejka zapisów: adres -> ostatnia wartość, wspólny future dla całej paczki
+        self._write_debounce = max(0.0, write_debounce)
+        self._pending_writes: Dict[int, int] = {}
+        self._pending_verify: set[int] = set()
+        self._pending_future: asyncio.Future | None = None
+        self._pending_since: float = 0.0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Referencje do trwających zapisów – pętla trzyma zadania tylko słabo
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._write_listener: Callable[[Dict[int, int], bool], None] | None = None
+
+        self._verify_backoff = max(0.01, verify_backoff)
+        self._verify_timeout = max(0.0, verify_timeout)
+
+        # Adresy potrzebne encjom (z mapy rejestrów) – planner scala je w jak najmniej zapytań
+        self._register_defs = tuple(registers)
+        self._disabled_consumers: frozenset[str] = frozenset()
+        self._wanted: Dict[str, set[int]] = wanted_addresses(self._register_defs)
+        # Zmiany planu spoza blokady (rejestr encji, odrzucone adresy) – stosowane na początku następnego cyklu
+        self._pending_wanted: Dict[str, set[int]] | None = None
+        self._replan = False
+        # Rejestry przejściowe – w trybie burst czytane są też bloki z innych grup, które je zawierają
+        self._burst: Dict[str, set[int]] = burst_addresses(self._register_defs)
+        max_registers = min(max_registers, MAX_REGISTERS_PER_READ)
+        self._planners: Dict[str, ReadPlanner] = {
+            "holding": ReadPlanner(max_gap=max_gap, max_count=max_registers),
+            "input": ReadPlanner(max_gap=max_gap, max_count=max_registers),
+            "coil": ReadPlanner(max_gap=max_gap, max_count=MAX_COILS_PER_READ),
+        }
+        # Grupa odpytywania rejestru – domyślnie z mapy rejestrów
+        self._tiers: Dict[Tuple[str, int], str] = register_tiers(self._register_defs)
+        self._dirty_tiers: set[str] = set()
+
+        # Ostatnio odczytane wartości, wypełniane w miejscu – bloki spoza bieżącej grupy zachowują poprzedni odczyt
+        self._registers: Dict[str, RegisterImage] = {
+            "holding": RegisterImage("H"),
+            "input": RegisterImage("H"),
+            "coil": RegisterImage("B"),
+        }
+        self._rebuild_plan()
 
     async def stop(self):
-        async with self._controller_lock:
-            _LOGGER.info("Stopping Modbus controller for %s:%d", self._host, self._port)
-            self._client.close()
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending_future and not self._pending_future.done():
+            self._pending_future.set_exception(ControllerException("Controller stopped before pending writes were sent"))
+        self._pending_writes, self._pending_future = {}, None
+        self._pending_verify = set()
 
-    async def fetch_data(self) -> ControllerData:
         async with self._controller_lock:
-            await self._ensure_connected()
+            _LOGGER.info("Stopping Modbus controller for %s:%d slave %d", self._host, self._port, self._slave)
+            # Bramka zamyka połączenie dopiero po odłączeniu ostatniego urządzenia
+            self._gateway.detach(self)
+
+    def set_disabled_consumers(self, unique_ids: Iterable[str]):
+        """Pomija rejestry, których wszystkie encje-odbiorcy są wyłączone (unique_id z rejestru encji).
+
+        Plan odczytów jest scalany od nowa (na początku następnego cyklu, pod blokadą kontrolera),
+        więc bloki bez aktywnych odbiorców znikają całkowicie.
+        """
+        disabled = frozenset(unique_ids)
+        if disabled == self._disabled_consumers:
+            return
+        self._disabled_consumers = disabled
+        wanted = wanted_addresses(
+            register for register in self._register_defs
+            if not disabled.issuperset(register.unique_ids(self._slave))
+        )
+        if wanted == (self._pending_wanted or self._wanted):
+            return
+        self._pending_wanted = wanted
+        _LOGGER.info(
+            "Slave %d: polling %d registers, %d skipped because their entities are disabled",
+            self._slave,
+            sum(len(addresses) for addresses in wanted.values()),
+            sum(len(addresses) for addresses in wanted_addresses(self._register_defs).values())
+            - sum(len(addresses) for addresses in wanted.values()),
+        )
 
-            data_holding: dict[int, int] = {}
-            data_input: dict[int, int] = {}
-            data_coil: dict[int, bool] = {}
+    def export_registers(self) -> Dict[str, list]:
+        """Obraz rejestrów do zapisania: typ -> [[adres, wartość, czas odczytu], ...]."""
+        return {
+            kind: [[address, int(value), image.timestamp(address)] for address, value in image.items()]
+            for kind, image in self._registers.items()
+        }
 
-            now = time.time()
-            if self._last_update_timestamp:
-                self._last_update_interval = now - self._last_update_timestamp
-                _LOGGER.debug("Time since last update: %.2f seconds", self._last_update_interval)
-            self._last_update_timestamp = now
+    def restore_registers(self, snapshot: Dict[str, list]) -> ControllerData:
+        """Wpisuje zapisany obraz (tylko rejestry z bieżącego planu) i zwraca go jako dane odtworzone."""
+        for kind, image in self._registers.items():
+            for address, value, stamp in snapshot.get(kind, ()):
+                if address in self._wanted[kind]:
+                    image.set(address, value, stamp)
+        return ControllerData(
+            holding=self._registers["holding"].snapshot(),
+            input=self._registers["input"].snapshot(),
+            coil=self._registers["coil"].snapshot(),
+            restored=True,
+        )
 
-            _LOGGER.debug("Reading all register blocks for slave %d", self._slave)
+    @property
+    def slave(self) -> int:
+        return self._slave
 
-            # Read holding registers
-            for start, count in self._holding_blocks:
-                try:
-                    result = await self._client.read_holding_registers(address=start, count=count,
-                                                                       device_id=self._slave)
-                    if result.isError():
-                        raise ControllerException(f"Error reading holding registers {start}-{start + count - 1}")
-                    for i, val in enumerate(result.registers):
-                        data_holding[start + i] = val
-                    _LOGGER.debug("Holding registers %d-%d read: %s", start, start + count - 1, result.registers)
-                except Exception as e:
-                    raise ControllerException(
-                        f"Exception reading holding registers {start}-{start + count - 1}: {e}") from e
-
-            # Read input registers
-            for start, count in self._input_blocks:
-                try:
-                    result = await self._client.read_input_registers(address=start, count=count, device_id=self._slave)
-                    if result.isError():
-                        raise ControllerException(f"Error reading input registers {start}-{start + count - 1}")
-                    for i, val in enumerate(result.registers):
-                        data_input[start + i] = val
-                    _LOGGER.debug("Input registers %d-%d read: %s", start, start + count - 1, result.registers)
-                except Exception as e:
-                    raise ControllerException(
-                        f"Exception reading input registers {start}-{start + count - 1}: {e}") from e
-
-            # Read coils
-            for start, count in self._coil_blocks:
+    @property
+    def register_defs(self) -> Tuple[RegisterDef, ...]:
+        return self._register_defs
+
+    def tier_of(self, kind: str, address: int) -> str:
+        return self._tiers.get((kind, address), TIER_NORMAL)
+
+    async def fetch_data(
+        self, tiers: Iterable[str] | None = None, burst: bool = False, budget: float | None = None
+    ) -> ControllerData:
+        """Czyta bloki podanych grup (domyślnie wszystkich) i zwraca pełny obraz rejestrów.
+
+        Z ``burst=True`` czyta dodatkowo bloki pozostałych grup zawierające rejestry przejściowe.
+        Po ``budget`` sekundach nie są wysyłane kolejne zapytania – pozostałe bloki są czytane
+        na początku następnego cyklu, a blokada kontrolera zostaje zwolniona.
+        """
+        self._check_breaker()
+        async with self._locked():
+            started = time.monotonic()
+            try:
+                data = await self._fetch_locked(tiers, burst, budget)
+            except ControllerException:
+                self._record_failure()
+                raise
+            finally:
+                self._metrics.cycle_time.add(time.monotonic() - started)
+            self._breaker.record_success()
+            return data
+
+    async def _fetch_locked(
+        self, tiers: Iterable[str] | None, burst: bool = False, budget: float | None = None
+    ) -> ControllerData:
+        await self._ensure_connected()
+
+        self._apply_plan_changes()
+        tiers = set(TIERS if tiers is None else tiers) | self._dirty_tiers
+
+        data = self._registers
+
+        now = time.time()
+        if self._last_update_timestamp:
+            self._last_update_interval = now - self._last_update_timestamp
+            _LOGGER.debug("Time since last update: %.2f seconds", self._last_update_interval)
+        self._last_update_timestamp = now
+
+        _LOGGER.debug("Reading %s register blocks for slave %d", sorted(tiers), self._slave)
+
+        # Plan liczony z sumy adresów wszystkich należnych grup – jeden cykl nie czyta rejestru dwa razy
+        deferred_before = {kind: addresses & self._wanted[kind] for kind, addresses in self._deferred.items()}
+        reads = []
+        for kind, wanted in self._wanted.items():
+            due = {address for address in wanted if self.tier_of(kind, address) in tiers} | deferred_before[kind]
+            if burst:
+                due |= self._burst[kind] & wanted
+            reads += [(kind, start, count, due) for start, count in self._planners[kind].plan(due)]
+        # Bloki odłożone w poprzednim cyklu idą na początek kolejki, żeby żaden blok nie był pomijany w nieskończoność
+        reads.sort(key=lambda read: not _contains_any(read, deferred_before[read[0]]))
+        self._deferred = {kind: set() for kind in self._deferred}
+
+        cycle_start = time.monotonic()
+        self._cycle_deadline = cycle_start + budget if budget else None
+        self._wire_time = 0.0
+        if self._breaker.probing and reads:
+            # Bezpiecznik w stanie half-open: najpierw pojedyncze zapytanie próbne, reszta tylko po sukcesie
+            await self._read_planned_block(*reads[0], data[reads[0][0]])
+            self._breaker.record_success()
+            reads = reads[1:]
+
+        if self.pipelined:
+            failed, deferred = await self._read_pipelined(reads, data)
+        else:
+            failed, deferred = await self._read_serial(reads, data)
+        self._cycle_deadline = None
+
+        # Każdy blok odczytywany niezależnie – nieudane zachowują ostatnie dobre wartości (z ich czasem)
+        attempted = len(reads) - len(deferred)
+        if attempted and len(failed) == attempted:
+            raise ControllerException(f"All {attempted} register blocks failed for slave {self._slave}")
+        if not failed:
+            self._dirty_tiers -= tiers
+        if deferred:
+            for kind, start, count, wanted in deferred:
+                self._deferred[kind] |= {address for address in wanted if start <= address < start + count}
+            self._metrics.overruns += 1
+            _LOGGER.warning(
+                "Slave %d: cycle budget of %.1f s exhausted, %d of %d blocks deferred to the next cycle",
+                self._slave, budget, len(deferred), len(reads),
+            )
+
+        # Czas zapytań na łączu / czas całego cyklu – ile zyskujemy na równoległości (sekwencyjnie ≈ 1)
+        wall = time.monotonic() - cycle_start
+        self._read_speedup = round(self._wire_time / wall, 2) if wall > 0 and self._wire_time else 1.0
+
+        return ControllerData(
+            holding=data["holding"].snapshot(),
+            input=data["input"].snapshot(),
+            coil=data["coil"].snapshot(),
+            update_interval=round(self._last_update_interval, 2),
+            read_speedup=self._read_speedup,
+            pipelined=self.pipelined,
+            failed_blocks=tuple(f"{kind} {start}-{start + count - 1}" for kind, start, count, _ in failed),
+            deferred_blocks=tuple(f"{kind} {start}-{start + count - 1}" for kind, start, count, _ in deferred),
+        )
+
+    async def write_register(self, address: int, value: int, verify: bool = False) -> WriteResult:
+        self._check_breaker()
+        async with self._locked():
+            try:
+                await self._ensure_connected()
+                await self._write_run(address, [value])
+            except ControllerException:
+                self._record_failure()
+                raise
+            self._breaker.record_success()
+
+        if verify:
+            return (await self._verify_writes({address: value}))[address]
+        self._mark_written({address})
+        return WriteResult(address, value)
+
+    def set_write_listener(self, listener: Callable[[Dict[int, int], bool], None] | None):
+        """Callback po zapisie paczki z kolejki: (adres -> wartość, potwierdzone odczytem).
+
+        Wywoływany raz po wysłaniu zapisów (``False``) i – jeśli paczka zawierała zapisy
+        weryfikowane – drugi raz z wartościami odczytanymi z urządzenia (``True``).
+        """
+        self._write_listener = listener
+
+    async def queue_write(self, address: int, value: int, verify: bool = False) -> WriteResult:
+        """Dodaje zapis do kolejki; w oknie debounce liczy się tylko ostatnia wartość rejestru.
+
+        Oczekujące zapisy sąsiednich rejestrów wysyłane są jednym FC16 ``write_registers``.
+        """
+        loop = asyncio.get_running_loop()
+        if self._pending_future is None:
+            self._pending_future = loop.create_future()
+            self._pending_since = loop.time()
+        self._pending_writes[address] = value
+        if verify:
+            self._pending_verify.add(address)
+        future = self._pending_future
+
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        delay = min(self._write_debounce, max(0.0, self._pending_since + WRITE_MAX_DELAY - loop.time()))
+        self._flush_handle = loop.call_later(delay, self._start_flush)
+
+        # Future jest wspólny dla całej paczki – anulowanie jednego wywołującego nie może anulować zapisów pozostałych
+        return (await asyncio.shield(future))[address]
+
+    def _start_flush(self):
+        task = asyncio.get_running_loop().create_task(self._flush_writes())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_writes(self):
+        self._flush_handle = None
+        writes, future, verify = self._pending_writes, self._pending_future, self._pending_verify
+        self._pending_writes, self._pending_future, self._pending_verify = {}, None, set()
+        if future is None or future.done():
+            return
+
+        try:
+            self._check_breaker()
+            async with self._locked():
                 try:
-                    result = await self._client.read_coils(address=start, count=count, device_id=self._slave)
-                    if result.isError():
-                        raise ControllerException(f"Error reading coils {start}-{start + count - 1}")
-                    for i, val in enumerate(result.bits):
-                        data_coil[start + i] = bool(val)
-                    _LOGGER.debug("Coils %d-%d read: %s", start, start + count - 1, result.bits)
-                except Exception as e:
-                    raise ControllerException(f"Exception reading coils {start}-{start + count - 1}: {e}") from e
-
-            return ControllerData(
-                holding=data_holding,
-                input=data_input,
-                coil=data_coil,
-                update_interval=round(self._last_update_interval, 2)
+                    await self._ensure_connected()
+                    for start, count in split_runs(min(writes), max(writes) - min(writes) + 1, writes):
+                        await self._write_run(start, [writes[start + i] for i in range(count)])
+                except ControllerException:
+                    self._record_failure()
+                    raise
+                self._breaker.record_success()
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        if self._write_listener:
+            self._write_listener(writes, False)
+
+        results = {address: WriteResult(address, value) for address, value in writes.items()}
+        if verify:
+            results.update(await self._verify_writes({a: writes[a] for a in verify}))
+            if self._write_listener:
+                read_back = {a: r.read_value for a, r in results.items() if r.read_value is not None}
+                self._write_listener(read_back, True)
+        self._mark_written(a for a, r in results.items() if not r.verified)
+        future.set_result(results)
+
+    async def _verify_writes(self, writes: Dict[int, int]) -> Dict[int, WriteResult]:
+        """Odczytuje zwrotnie tylko zapisane adresy, ponawiając z rosnącą przerwą do limitu czasu."""
+        results = {address: WriteResult(address, value, verified=False) for address, value in writes.items()}
+        remaining = dict(writes)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._verify_timeout
+        delay = self._verify_backoff
+
+        while remaining:
+            await asyncio.sleep(delay)
+            try:
+                async with self._locked():
+                    await self._ensure_connected()
+                    for start, count in self._planners["holding"].plan(remaining):
+                        values = await self._read_block("holding", start, count)
+                        for i, val in enumerate(values):
+                            result = results.get(start + i)
+                            if result is None or start + i not in remaining:
+                                continue
+                            result.read_value = val
+                            result.attempts += 1
+                            if val == remaining[start + i]:
+                                result.verified = True
+                                del remaining[start + i]
+                                self._registers["holding"].set(start + i, val)
+            except ControllerException as e:
+                _LOGGER.debug("Read-back of written registers %s failed: %s", sorted(remaining), e)
+
+            delay *= 2
+            if loop.time() + delay > deadline:
+                break
+            if remaining:
+                self._metrics.retries += 1
+
+        for address in remaining:
+            _LOGGER.warning(
+                "Write of register %d = %s not confirmed by the device (read %s)",
+                address, writes[address], results[address].read_value,
             )
+        return results
 
-    async def write_register(self, address: int, value: int) -> bool:
-        async with self._controller_lock:
-            await self._ensure_connected()
+    def _mark_written(self, addresses: Iterable[int]):
+        # Zapisany rejestr ma zostać odczytany przy najbliższym odświeżeniu, niezależnie od grupy
+        for address in addresses:
+            self._dirty_tiers.add(self.tier_of("holding", address))
+
+    async def _write_run(self, address: int, values: List[int]):
+        """Zapisuje ciągły zakres rejestrów: FC6 dla jednego, FC16 dla kilku."""
+        end = address + len(values) - 1
+        try:
+            _LOGGER.debug("Writing registers %d-%d = %s (slave=%d)", address, end, values, self._slave)
+            block = f"holding {address}-{end}"
+            if len(values) == 1:
+                result = await self._execute(block, FC_WRITE_SINGLE, lambda client: client.write_register(
+                    address=address, value=values[0], device_id=self._slave
+                ))
+            else:
+                result = await self._execute(block, FC_WRITE_MULTIPLE, lambda client: client.write_registers(
+                    address=address, values=values, device_id=self._slave
+                ))
+            if result.isError():
+                raise ControllerException(f"Failed to write registers {address}-{end} with values {values}")
+        except ControllerException:
+            raise
+        except Exception as e:
+            raise ControllerException(f"Exception writing registers {address}-{end} = {values}: {e}") from e
+
+        _LOGGER.info("Successfully wrote registers %d-%d = %s", address, end, values)
+
+    @property
+    def pipelined(self) -> bool:
+        return self._pipeline_window > 1 and self._pipeline_failed_cycles < PIPELINE_MAX_FAILED_CYCLES
 
+    def _budget_exhausted(self) -> bool:
+        return self._cycle_deadline is not None and time.monotonic() >= self._cycle_deadline
+
+    async def _read_serial(self, reads: list, data: Dict[str, RegisterImage]) -> Tuple[list, list]:
+        """Czyta bloki po kolei; błąd jednego bloku nie przerywa cyklu.
+
+        Zwraca (nieudane, odłożone po wyczerpaniu budżetu).
+        """
+        failed = []
+        for i, read in enumerate(reads):
+            if self._budget_exhausted():
+                return failed, reads[i:]
             try:
-                _LOGGER.debug("Writing register %d = %s (slave=%d)", address, value, self._slave)
-                result = await self._client.write_register(address=address, value=value, device_id=self._slave)
-                if result.isError():
-                    raise ControllerException(f"Failed to write register {address} with value {value}")
-                _LOGGER.info("Successfully wrote register %d = %s", address, value)
+                await self._read_planned_block(*read, data[read[0]])
+            except ControllerException as e:
+                kind, start, count, _ = read
+                _LOGGER.warning("Reading %s block %d-%d failed, keeping last values: %s", kind, start, start + count - 1, e)
+                failed.append(read)
+        return failed, []
+
+    async def _read_pipelined(self, reads: list, data: Dict[str, RegisterImage]) -> Tuple[list, list]:
+        """Wysyła zaplanowane odczyty równolegle (maks. ``pipeline_window`` w locie, każdy własnym połączeniem bramki).
+
+        Bloki, które się nie powiodły, są ponawiane sekwencyjnie; po kilku takich cyklach
+        z rzędu tryb potokowy zostaje wyłączony.
+        """
+        window = asyncio.Semaphore(self._pipeline_window)
+
+        async def _run(read):
+            async with window:
+                if self._budget_exhausted():
+                    return False
+                await self._read_planned_block(*read, data[read[0]])
                 return True
+
+        results = await asyncio.gather(*(_run(read) for read in reads), return_exceptions=True)
+        failed = [read for read, r in zip(reads, results) if isinstance(r, BaseException)]
+        deferred = [read for read, r in zip(reads, results) if r is False]
+        if not failed:
+            self._pipeline_failed_cycles = 0
+            return [], deferred
+
+        self._pipeline_failed_cycles += 1
+        self._metrics.retries += len(failed)
+        _LOGGER.debug("%d pipelined reads failed for slave %d, retrying serially", len(failed), self._slave)
+        if not self.pipelined:
+            _LOGGER.warning(
+                "Gateway %s:%d does not handle pipelined requests reliably, falling back to serial reads",
+                self._host, self._port,
+            )
+        failed, retry_deferred = await self._read_serial(failed, data)
+        return failed, deferred + retry_deferred
+
+    def _apply_plan_changes(self):
+        """Przebudowa planu i obrazu tylko między cyklami – bloki w locie muszą trafić do istniejących segmentów."""
+        if self._pending_wanted is not None:
+            self._wanted, self._pending_wanted = self._pending_wanted, None
+            self._replan = True
+        if self._replan:
+            self._replan = False
+            self._rebuild_plan()
+
+    def _rebuild_plan(self):
+        # Bloki planowane są przy każdym odczycie z adresów należnych grup; segment obrazu musi
+        # pomieścić każdy taki blok, więc obraz budowany jest z zakresów bez limitu długości
+        for kind, image in self._registers.items():
+            image.reshape(self._planners[kind].spans(self._wanted[kind]))
+        plan = {kind: self._planners[kind].plan(wanted) for kind, wanted in self._wanted.items()}
+        _LOGGER.debug(
+            "Read plan for slave %d: %d requests per full cycle %s",
+            self._slave, sum(len(blocks) for blocks in plan.values()), plan,
+        )
+
+    async def _read_planned_block(self, kind: str, start: int, count: int, wanted: set[int], out: RegisterImage):
+        """Czyta scalony blok; przy odrzuceniu adresów wypełniających dzieli go na fragmenty."""
+        runs = split_runs(start, count, wanted)
+        try:
+            values = await self._read_block(kind, start, count)
+        except IllegalAddressException:
+            if len(runs) < 2:
+                raise
+            _LOGGER.info(
+                "Device rejected merged %s block %d-%d, splitting around unused addresses",
+                kind, start, start + count - 1,
+            )
+            self._metrics.retries += len(runs)
+            for run_start, run_count in runs:
+                self._fill(out, kind, run_start, await self._read_block(kind, run_start, run_count))
+            # Adresy między fragmentami nie są potrzebne – nie używamy ich więcej jako wypełnienia
+            gaps = expand_blocks([(start, count)]) - self._wanted[kind]
+            if self._planners[kind].mark_rejected(gaps):
+                self._replan = True
+            return
+
+        self._fill(out, kind, start, values)
+
+    def _fill(self, out: RegisterImage, kind: str, start: int, values: list):
+        try:
+            out.fill(start, values)
+        except KeyError as e:
+            # Blok zaplanowany przed zmianą planu – zwykły błąd odczytu, blok zostanie przeczytany ponownie
+            raise ControllerException(f"Read {kind} block {start}-{start + len(values) - 1} outside the read plan") from e
+
+    async def _read_block(self, kind: str, start: int, count: int) -> list:
+        if kind == "holding":
+            label, method, fc = "holding registers", "read_holding_registers", FC_READ_HOLDING
+        elif kind == "input":
+            label, method, fc = "input registers", "read_input_registers", FC_READ_INPUT
+        else:
+            label, method, fc = "coils", "read_coils", FC_READ_COILS
+
+        try:
+            result = await self._execute(
+                f"{kind} {start}-{start + count - 1}", fc,
+                lambda client: getattr(client, method)(address=start, count=count, device_id=self._slave),
+            )
+        except Exception as e:
+            raise ControllerException(f"Exception reading {label} {start}-{start + count - 1}: {e}") from e
+
+        if result.isError():
+            if isinstance(result, ExceptionResponse) and result.exception_code == ILLEGAL_DATA_ADDRESS:
+                raise IllegalAddressException(f"Device rejected {label} {start}-{start + count - 1}")
+            raise ControllerException(f"Error reading {label} {start}-{start + count - 1}")
+
+        if kind == "coil":
+            values = [bool(val) for val in result.bits[:count]]
+        else:
+            values = list(result.registers)
+        _LOGGER.debug("%s %d-%d read: %s", label.capitalize(), start, start + count - 1, values)
+        return values
+
+    async def _execute(self, block: str, function_code: int, request: Callable[[AsyncModbusTcpClient], Awaitable]):
+        """Wysyła jedno zapytanie przez bramkę, mierząc oczekiwanie na magistralę i czas odpowiedzi.
+
+        Limit czasu liczony jest od wysłania – połączenie ze slotu bramki nie jest w tym czasie
+        używane przez inne zapytanie, więc czekanie w kolejce nie zjada limitu.
+        """
+        queued = time.monotonic()
+        async with self._gateway.request_slot() as client:
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(request(client), self._request_timeout)
             except Exception as e:
-                raise ControllerException(f"Exception writing register {address} = {value}: {e}") from e
+                elapsed = time.monotonic() - started
+                self._wire_time += elapsed
+                self._metrics.record_request(block, function_code, elapsed, started - queued, False)
+                # pymodbus zamienia anulowanie na własny wyjątek – o przekroczeniu czasu decyduje zegar
+                if isinstance(e, asyncio.TimeoutError) or elapsed >= self._request_timeout:
+                    raise asyncio.TimeoutError(f"No response within {self._request_timeout:.1f} s") from None
+                raise
+        elapsed = time.monotonic() - started
+        self._wire_time += elapsed
+        self._metrics.record_request(block, function_code, elapsed, started - queued, not result.isError())
+        return result
+
+    @asynccontextmanager
+    async def _locked(self):
+        """Blokada kontrolera z pomiarem czasu oczekiwania na nią."""
+        queued = time.monotonic()
+        async with self._controller_lock:
+            self._metrics.lock_wait.add(time.monotonic() - queued)
+            yield
+
+    @property
+    def metrics(self) -> ControllerMetrics:
+        return self._metrics
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    @property
+    def gateway(self) -> ModbusGateway:
+        return self._gateway
+
+    def _check_breaker(self):
+        """Szybki błąd bez czekania na blokadę, gdy bezpiecznik jest otwarty."""
+        if not self._breaker.allow_request():
+            raise CircuitOpenException(
+                f"Modbus {self._host}:{self._port} unavailable, next connection probe in "
+                f"{self._breaker.seconds_until_probe:.0f} s"
+            )
+
+    def _record_failure(self):
+        self._breaker.record_failure()
+        # Nie pozwalamy klientowi samodzielnie łączyć się w tle – o próbach decydują bezpieczniki urządzeń
+        self._gateway.suspend()
 
     async def _ensure_connected(self):
         if self._client.connected:
@@ -137,7 +741,7 @@ class ThesslaGreenModbusController:
 
         _LOGGER.info("Attempting connection to Modbus server %s:%d", self._host, self._port)
         try:
-            if await self._client.connect():
+            if await self._gateway.connect():
                 _LOGGER.info("Successfully connected to Modbus server %s:%d", self._host, self._port)
                 return
         except Exception as e:
@@ -7,6 +7,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 
 from . import DOMAIN
+from .registers import PREDKOSC_RECZNA
 from .coordinator import ThesslaGreenCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ class RekuperatorPredkoscNumber(NumberEntity):
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
-        self._address = 4210
+        self._address = PREDKOSC_RECZNA.address
         self._slave = slave
         self._attr_name = "Rekuperator Prędkość"
         self._attr_native_unit_of_measurement = "%"
@@ -49,19 +50,21 @@ class RekuperatorPredkoscNumber(NumberEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def native_value(self) -> float | None:
         """Return the current speed value."""
         return self.coordinator.safe_data.holding.get(self._address)
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_set_native_value(self, value: float) -> None:
         """Write speed value to the device."""
         try:
-            success = await self.coordinator.controller.write_register(self._address, int(value))
-            if success:
-                await self.coordinator.async_request_refresh()
+            await self.coordinator.async_write_register(self._address, int(value))
         except Exception as e:
             _LOGGER.exception(f"Exception during setting prędkość: {e}")
 
@@ -71,4 +74,6 @@ class RekuperatorPredkoscNumber(NumberEntity):
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
\ No newline at end of file
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self.async_write_ha_state, [("holding", self._address)]
+        ))
\ No newline at end of file
@@ -3,7 +3,46 @@ from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.selector import selector
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_MAX_GAP,
+    CONF_MAX_REGISTERS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_PIPELINE_WINDOW,
+    CONF_WRITE_DEBOUNCE,
+    CONF_VERIFY_BACKOFF,
+    CONF_VERIFY_TIMEOUT,
+    CONF_STALE_AFTER,
+    CONF_BURST_INTERVAL,
+    CONF_BURST_DURATION,
+    CONF_REQUEST_TIMEOUT,
+    CONF_CYCLE_BUDGET,
+    CONF_HISTORY_DEPTH,
+    CONF_DERIVED_SMOOTHING,
+    CONF_DERIVED_WINDOW,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_COP_INTERVAL,
+    DEFAULT_MAX_GAP,
+    DEFAULT_MAX_REGISTERS,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_WRITE_DEBOUNCE,
+    DEFAULT_VERIFY_BACKOFF,
+    DEFAULT_VERIFY_TIMEOUT,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_BURST_INTERVAL,
+    DEFAULT_BURST_DURATION,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_CYCLE_BUDGET,
+    DEFAULT_HISTORY_DEPTH,
+    DEFAULT_DERIVED_SMOOTHING,
+    DEFAULT_DERIVED_WINDOW,
+    DEFAULT_LONG_TERM_STATISTICS,
+    DEFAULT_COP_INTERVAL,
+    SMOOTHING_MODES,
+)
 
 # Czytelna etykieta w UI (bez strings.json)
 DISPLAY_KEY = "Sensor poboru mocy (W lub kW)"
@@ -23,9 +62,8 @@ class ThesslaGreenOptionsFlowHandler(config_entries.OptionsFlow):
             # pobierz wartość spod etykiety (bez strings.json używamy 'ładnego' klucza)
             entity_id = user_input.get(DISPLAY_KEY)
 
-            if not entity_id:
-                errors[DISPLAY_KEY] = "Wybierz sensor poboru mocy."
-            else:
+            # Sensor mocy jest opcjonalny – bez niego tylko COP pozostaje 'unavailable'
+            if entity_id:
                 st = hass.states.get(entity_id)
                 unit = st and st.attributes.get("unit_of_measurement")
                 if unit and unit not in ACCEPTED_UNITS:
@@ -33,20 +71,22 @@ class ThesslaGreenOptionsFlowHandler(config_entries.OptionsFlow):
 
             if not errors:
                 # Zapisz pod standardową nazwą opcji
-                return self.async_create_entry(
-                    title="",
-                    data={"sensor_power": entity_id},
-                )
+                options = {k: v for k, v in user_input.items() if k != DISPLAY_KEY}
+                if entity_id:
+                    options["sensor_power"] = entity_id
+                return self.async_create_entry(title="", data=options)
 
         # domyślna wartość do formularza (jeśli wcześniej zapisano)
-        default_entity = self.config_entry.options.get("sensor_power")
+        options = self.config_entry.options
+        default_entity = options.get("sensor_power")
 
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
+                # Podpowiedź zamiast wartości domyślnej, aby wyczyszczone pole nie wracało do starego sensora
                 vol.Optional(
                     DISPLAY_KEY,
-                    default=default_entity
+                    description={"suggested_value": default_entity},
                 ): selector({
                     "entity": {
                         "domain": "sensor",
@@ -54,6 +94,90 @@ class ThesslaGreenOptionsFlowHandler(config_entries.OptionsFlow):
                         "device_class": "power"
                     }
                 }),
+                # Planowanie odczytów: maks. przerwa między adresami i maks. rejestrów w zapytaniu
+                vol.Optional(
+                    CONF_MAX_GAP,
+                    default=options.get(CONF_MAX_GAP, DEFAULT_MAX_GAP),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=124)),
+                vol.Optional(
+                    CONF_MAX_REGISTERS,
+                    default=options.get(CONF_MAX_REGISTERS, DEFAULT_MAX_REGISTERS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=125)),
+                # Interwały grup odpytywania (grupa "normal" używa scan_interval z konfiguracji)
+                vol.Optional(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                # Liczba równoczesnych zapytań do bramki (1 = sekwencyjnie)
+                vol.Optional(
+                    CONF_PIPELINE_WINDOW,
+                    default=options.get(CONF_PIPELINE_WINDOW, DEFAULT_PIPELINE_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                # Okno (s) łączenia szybkich zapisów, np. przy przesuwaniu suwaka prędkości
+                vol.Optional(
+                    CONF_WRITE_DEBOUNCE,
+                    default=options.get(CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+                # Weryfikacja zapisu odczytem zwrotnym: pierwsza przerwa i limit czasu (s)
+                vol.Optional(
+                    CONF_VERIFY_BACKOFF,
+                    default=options.get(CONF_VERIFY_BACKOFF, DEFAULT_VERIFY_BACKOFF),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.05, max=5)),
+                vol.Optional(
+                    CONF_VERIFY_TIMEOUT,
+                    default=options.get(CONF_VERIFY_TIMEOUT, DEFAULT_VERIFY_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=30)),
+                # Po ilu sekundach bez udanego odczytu encja staje się niedostępna
+                vol.Optional(
+                    CONF_STALE_AFTER,
+                    default=options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                # Szybkie odpytywanie po zapisie / alarmie: interwał i czas trwania (s, 0 = wyłączone)
+                vol.Optional(
+                    CONF_BURST_INTERVAL,
+                    default=options.get(CONF_BURST_INTERVAL, DEFAULT_BURST_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                vol.Optional(
+                    CONF_BURST_DURATION,
+                    default=options.get(CONF_BURST_DURATION, DEFAULT_BURST_DURATION),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
+                # Limit czasu pojedynczego zapytania i budżet cyklu odczytu (s, 0 = automatycznie)
+                vol.Optional(
+                    CONF_REQUEST_TIMEOUT,
+                    default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.2, max=30)),
+                vol.Optional(
+                    CONF_CYCLE_BUDGET,
+                    default=options.get(CONF_CYCLE_BUDGET, DEFAULT_CYCLE_BUDGET),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+                # Liczba próbek historii w pamięci na rejestr (0 = wyłączona)
+                vol.Optional(
+                    CONF_HISTORY_DEPTH,
+                    default=options.get(CONF_HISTORY_DEPTH, DEFAULT_HISTORY_DEPTH),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=20000)),
+                # Wygładzanie sprawności i mocy odzysku (none / ema / median) i liczba próbek okna
+                vol.Optional(
+                    CONF_DERIVED_SMOOTHING,
+                    default=options.get(CONF_DERIVED_SMOOTHING, DEFAULT_DERIVED_SMOOTHING),
+                ): vol.In(SMOOTHING_MODES),
+                vol.Optional(
+                    CONF_DERIVED_WINDOW,
+                    default=options.get(CONF_DERIVED_WINDOW, DEFAULT_DERIVED_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                # Godzinowe statystyki długoterminowe (średnia/min/max) zapisywane paczkami
+                vol.Optional(
+                    CONF_LONG_TERM_STATISTICS,
+                    default=options.get(CONF_LONG_TERM_STATISTICS, DEFAULT_LONG_TERM_STATISTICS),
+                ): bool,
+                # Minimalny odstęp przeliczeń COP (s); moc uśredniana z całego okna
+                vol.Optional(
+                    CONF_COP_INTERVAL,
+                    default=options.get(CONF_COP_INTERVAL, DEFAULT_COP_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
             }),
             errors=errors,
         )
\ No newline at end of file
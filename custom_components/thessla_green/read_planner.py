@@ -0,0 +1,89 @@
+"""Planowanie odczytów Modbus – łączenie adresów w jak najmniej zapytań."""
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Tuple
+
+from .const import DEFAULT_MAX_GAP, DEFAULT_MAX_REGISTERS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Limity protokołu Modbus dla jednej ramki odczytu
+MAX_REGISTERS_PER_READ = 125
+MAX_COILS_PER_READ = 2000
+
+Block = Tuple[int, int]
+
+
+class ReadPlanner:
+    """Builds merged (start, count) read blocks from a set of wanted addresses.
+
+    Adjacent addresses are merged as long as the hole between them is at most
+    ``max_gap`` addresses and the resulting block does not exceed ``max_count``.
+    Addresses rejected by the device are never used as filler, so a block is
+    split around them.
+    """
+
+    def __init__(self, max_gap: int = DEFAULT_MAX_GAP, max_count: int = DEFAULT_MAX_REGISTERS):
+        self._max_gap = max(0, max_gap)
+        self._max_count = max(1, max_count)
+        self._rejected: set[int] = set()
+
+    @property
+    def rejected(self) -> frozenset[int]:
+        return frozenset(self._rejected)
+
+    def mark_rejected(self, addresses: Iterable[int]) -> bool:
+        """Remember addresses the device refuses to serve. Returns True if anything new was added."""
+        new = set(addresses) - self._rejected
+        if new:
+            _LOGGER.debug("Marking addresses as rejected: %s", sorted(new))
+            self._rejected |= new
+        return bool(new)
+
+    def plan(self, addresses: Iterable[int]) -> List[Block]:
+        return self._merge(addresses, self._max_count)
+
+    def spans(self, addresses: Iterable[int]) -> List[Block]:
+        """Zakresy bez limitu długości bloku – każdy blok planu dowolnego podzbioru adresów mieści się w jednym z nich."""
+        return self._merge(addresses, None)
+
+    def _merge(self, addresses: Iterable[int], max_count: int | None) -> List[Block]:
+        wanted = sorted(set(addresses))
+        blocks: List[Block] = []
+        if not wanted:
+            return blocks
+
+        start = prev = wanted[0]
+        for addr in wanted[1:]:
+            if (
+                addr - prev - 1 <= self._max_gap
+                and (max_count is None or addr - start + 1 <= max_count)
+                and not self._has_rejected_between(prev, addr)
+            ):
+                prev = addr
+                continue
+            blocks.append((start, prev - start + 1))
+            start = prev = addr
+        blocks.append((start, prev - start + 1))
+        return blocks
+
+    def _has_rejected_between(self, low: int, high: int) -> bool:
+        return any(low < addr < high for addr in self._rejected)
+
+
+def expand_blocks(blocks: Iterable[Block]) -> set[int]:
+    """Zamienia listę bloków (start, count) na zbiór adresów."""
+    return {start + i for start, count in blocks for i in range(count)}
+
+
+def split_runs(start: int, count: int, wanted: Iterable[int]) -> List[Block]:
+    """Dzieli blok na ciągłe fragmenty zawierające wyłącznie adresy z ``wanted``."""
+    inside = sorted(a for a in set(wanted) if start <= a < start + count)
+    runs: List[Block] = []
+    for addr in inside:
+        if runs and runs[-1][0] + runs[-1][1] == addr:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((addr, 1))
+    return runs
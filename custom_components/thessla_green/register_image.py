@@ -0,0 +1,212 @@
+"""Zwarty obraz rejestrów oparty na tablicach ``array`` – segmenty odpowiadają zaplanowanym blokom."""
+from __future__ import annotations
+
+from array import array
+import time
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class _Segment:
+    __slots__ = ("start", "values", "valid", "stamps")
+
+    def __init__(self, start: int, values: array, valid: bytearray, stamps: array):
+        self.start = start
+        self.values = values
+        self.valid = valid
+        # Czas (time.time()) ostatniego udanego odczytu każdego rejestru
+        self.stamps = stamps
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def copy(self) -> "_Segment":
+        return _Segment(
+            self.start, array(self.values.typecode, self.values), bytearray(self.valid), array("d", self.stamps)
+        )
+
+
+class RegisterImage:
+    """Register values for one register type, stored in ``array`` segments.
+
+    The controller owns a mutable image and fills it in place from ``result.registers``;
+    ``snapshot()`` returns a frozen copy that is handed out in ``ControllerData``.
+    Lookups mirror ``dict.get`` so entities read it exactly like before.
+    """
+
+    __slots__ = ("_typecode", "_segments", "_starts", "_frozen")
+
+    def __init__(self, typecode: str = "H", blocks: Iterable[Tuple[int, int]] = (), frozen: bool = False):
+        self._typecode = typecode
+        self._segments: List[_Segment] = []
+        self._starts: List[int] = []
+        self._frozen = False
+        self.reshape(blocks)
+        self._frozen = frozen
+
+    # --- odczyt -------------------------------------------------------------
+
+    def _locate(self, address: int) -> Tuple[_Segment, int] | Tuple[None, int]:
+        idx = bisect_right(self._starts, address) - 1
+        if idx >= 0:
+            seg = self._segments[idx]
+            offset = address - seg.start
+            if offset < len(seg):
+                return seg, offset
+        return None, 0
+
+    def get(self, address: int, default=None):
+        seg, offset = self._locate(address)
+        if seg is None or not seg.valid[offset]:
+            return default
+        value = seg.values[offset]
+        return bool(value) if self._typecode == "B" else value
+
+    def __getitem__(self, address: int):
+        value = self.get(address)
+        if value is None:
+            raise KeyError(address)
+        return value
+
+    def timestamp(self, address: int) -> float | None:
+        """Czas ostatniego udanego odczytu rejestru albo None, jeśli nigdy nie był odczytany."""
+        seg, offset = self._locate(address)
+        if seg is None or not seg.valid[offset]:
+            return None
+        return seg.stamps[offset]
+
+    def __contains__(self, address: int) -> bool:
+        seg, offset = self._locate(address)
+        return seg is not None and bool(seg.valid[offset])
+
+    def keys(self) -> Iterator[int]:
+        for seg in self._segments:
+            for offset, ok in enumerate(seg.valid):
+                if ok:
+                    yield seg.start + offset
+
+    __iter__ = keys
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        for address in self.keys():
+            yield address, self.get(address)
+
+    def __len__(self) -> int:
+        return sum(seg.valid.count(1) for seg in self._segments)
+
+    def __bool__(self) -> bool:
+        return any(1 in seg.valid for seg in self._segments)
+
+    def __repr__(self) -> str:
+        return f"RegisterImage({dict(self.items())})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RegisterImage):
+            return NotImplemented
+        return not self.diff(other)
+
+    # --- zapis (tylko obraz kontrolera) ----------------------------------------
+
+    def _check_mutable(self):
+        if self._frozen:
+            raise TypeError("Register snapshot is read-only")
+
+    def reshape(self, blocks: Iterable[Tuple[int, int]]):
+        """Przebudowuje segmenty pod nowy plan odczytów, zachowując znane wartości.
+
+        Nakładające się lub przylegające bloki (np. z różnych grup odpytywania) łączone są w jeden segment.
+        """
+        self._check_mutable()
+        spans: List[List[int]] = []
+        for start, count in sorted(blocks):
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], start + count)
+            else:
+                spans.append([start, start + count])
+
+        segments: List[_Segment] = []
+        for start, end in spans:
+            count = end - start
+            seg = _Segment(start, array(self._typecode, [0]) * count, bytearray(count), array("d", [0.0]) * count)
+            for offset in range(count):
+                value = self.get(start + offset)
+                if value is not None:
+                    seg.values[offset] = int(value)
+                    seg.valid[offset] = 1
+                    seg.stamps[offset] = self.timestamp(start + offset)
+            segments.append(seg)
+        self._segments = segments
+        self._starts = [seg.start for seg in segments]
+
+    def fill(self, start: int, values: Iterable[int], stamp: float | None = None):
+        """Wpisuje w miejscu wynik odczytu ciągłego bloku rozpoczynającego się od ``start``."""
+        self._check_mutable()
+        values = [int(v) for v in values]
+        seg, offset = self._locate(start)
+        if seg is None or offset + len(values) > len(seg):
+            raise KeyError(f"Block {start}-{start + len(values) - 1} is not part of the read plan")
+        end = offset + len(values)
+        seg.values[offset:end] = array(self._typecode, values)
+        seg.valid[offset:end] = b"\x01" * len(values)
+        seg.stamps[offset:end] = array("d", [time.time() if stamp is None else stamp]) * len(values)
+
+    def set(self, address: int, value: int, stamp: float | None = None) -> bool:
+        """Ustawia pojedynczy rejestr; zwraca False, gdy adres nie należy do planu."""
+        self._check_mutable()
+        seg, offset = self._locate(address)
+        if seg is None:
+            return False
+        seg.values[offset] = int(value)
+        seg.valid[offset] = 1
+        seg.stamps[offset] = time.time() if stamp is None else stamp
+        return True
+
+    # --- migawki ---------------------------------------------------------------
+
+    def snapshot(self) -> "RegisterImage":
+        """Niezmienna kopia obrazu (kopiowanie tablic to pojedynczy memcpy na segment)."""
+        image = RegisterImage.__new__(RegisterImage)
+        image._typecode = self._typecode
+        image._segments = [seg.copy() for seg in self._segments]
+        image._starts = list(self._starts)
+        image._frozen = True
+        return image
+
+    def with_values(self, values: Dict[int, int], stamp: float | None = None) -> "RegisterImage":
+        """Niezmienna kopia z nadpisanymi wartościami (np. po zapisie).
+
+        Bez ``stamp`` czas odczytu się nie zmienia – wartość niepotwierdzona nie odświeża rejestru.
+        """
+        image = self.snapshot()
+        for address, value in values.items():
+            seg, offset = image._locate(address)
+            if seg is not None:
+                seg.values[offset] = int(value)
+                seg.valid[offset] = 1
+                if stamp is not None:
+                    seg.stamps[offset] = stamp
+        return image
+
+    def diff(self, other: "RegisterImage") -> set[int]:
+        """Adresy, których wartość (lub obecność) różni się między obrazami."""
+        if self._starts == other._starts and all(
+            len(a) == len(b) for a, b in zip(self._segments, other._segments)
+        ):
+            changed: set[int] = set()
+            for a, b in zip(self._segments, other._segments):
+                # Porównanie całych tablic jest w C – pętla tylko dla segmentów z różnicą
+                if a.values == b.values and a.valid == b.valid:
+                    continue
+                for offset in range(len(a)):
+                    if a.valid[offset] != b.valid[offset] or (
+                        a.valid[offset] and a.values[offset] != b.values[offset]
+                    ):
+                        changed.add(a.start + offset)
+            return changed
+
+        addresses = set(self.keys()) | set(other.keys())
+        return {address for address in addresses if self.get(address) != other.get(address)}
+
+
+EMPTY_REGISTERS = RegisterImage("H", frozen=True)
+EMPTY_COILS = RegisterImage("B", frozen=True)
@@ -0,0 +1,133 @@
+"""Deklaratywna mapa rejestrów centrali – jedyne źródło adresów, typów, skali i grup odpytywania.
+
+Plan odczytów kontrolera jest wyliczany z tej mapy: czytane są dokładnie rejestry, które mają
+co najmniej jednego odbiorcę (encję), i żadne inne.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from .const import TIER_FAST, TIER_NORMAL, TIER_SLOW
+
+
+@dataclass(frozen=True)
+class RegisterDef:
+    """One device register and the entities that read it.
+
+    ``consumers`` are unique_id templates of those entities (``{slave}`` is replaced with
+    the slave id), including computed sensors that only use the register as an input.
+    ``burst`` marks registers that settle over several seconds after a mode change.
+    """
+    kind: str
+    address: int
+    signed: bool = False
+    scale: float = 1.0
+    tier: str = TIER_NORMAL
+    consumers: Tuple[str, ...] = ()
+    # Rejestr zmienia się w trakcie przejścia centrali (po zapisie, przy alarmie) – czytany w trybie burst
+    burst: bool = False
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return (self.kind, self.address)
+
+    def decode(self, raw):
+        """Surowa wartość z obrazu rejestrów → wartość fizyczna (int16 ze znakiem, skala)."""
+        if raw is None or self.kind == "coil":
+            return raw
+        if self.signed and raw > 0x7FFF:
+            raw -= 0x10000
+        return raw * self.scale if self.scale != 1 else raw
+
+    def unique_ids(self, slave: int) -> Tuple[str, ...]:
+        return tuple(template.format(slave=slave) for template in self.consumers)
+
+
+# Odbiorcy wspólni dla wielu rejestrów – sensory liczone
+_EFFICIENCY = "thessla_efficiency_{slave}"
+_RECOVERY_POWER = "thessla_recovery_power_{slave}"
+_COP = "thessla_cop_{slave}"
+_RECOVERED_ENERGY = "thessla_recovered_energy_{slave}"
+
+# --- Temperatury (input, 0.1 °C, ze znakiem) ---
+TEMP_CZERPNIA = RegisterDef("input", 16, signed=True, scale=0.1, tier=TIER_FAST, burst=True, consumers=(
+    "thessla_sensor_{slave}_16", _EFFICIENCY, _RECOVERY_POWER, _COP, _RECOVERED_ENERGY,
+))
+TEMP_NAWIEW = RegisterDef("input", 17, signed=True, scale=0.1, tier=TIER_FAST, burst=True, consumers=(
+    "thessla_sensor_{slave}_17", _EFFICIENCY, _RECOVERY_POWER, _COP, _RECOVERED_ENERGY,
+))
+TEMP_WYWIEW = RegisterDef("input", 18, signed=True, scale=0.1, tier=TIER_FAST, burst=True, consumers=(
+    "thessla_sensor_{slave}_18", _EFFICIENCY,
+))
+TEMP_ZA_FPX = RegisterDef("input", 19, signed=True, scale=0.1, tier=TIER_FAST, burst=True, consumers=("thessla_sensor_{slave}_19",))
+TEMP_PCB = RegisterDef("input", 22, signed=True, scale=0.1, tier=TIER_SLOW, consumers=("thessla_sensor_{slave}_22",))
+
+# --- Przepływy (holding, m3/h) ---
+STRUMIEN_NAWIEW = RegisterDef("holding", 256, burst=True, consumers=(
+    "thessla_sensor_{slave}_256", _RECOVERY_POWER, _COP, _RECOVERED_ENERGY,
+))
+STRUMIEN_WYWIEW = RegisterDef("holding", 257, burst=True, consumers=("thessla_sensor_{slave}_257",))
+
+# --- Tryby i nastawy (holding) ---
+FPX_FLAGA = RegisterDef("holding", 4192, tier=TIER_SLOW, consumers=("thessla_binary_sensor_{slave}_4192",))
+FPX_TRYB = RegisterDef("holding", 4198, consumers=("thessla_binary_sensor_{slave}_4198",))
+TRYB_PRACY = RegisterDef("holding", 4208, burst=True, consumers=("thessla_sensor_{slave}_4208", "thessla_switch_{slave}_4208"))
+SEZON = RegisterDef("holding", 4209, tier=TIER_SLOW, consumers=(
+    "thessla_binary_sensor_{slave}_4209", "thessla_sezon_select_{slave}_4209",
+))
+PREDKOSC_RECZNA = RegisterDef("holding", 4210, burst=True, consumers=("thessla_sensor_{slave}_4210", "thessla_number_{slave}_4210"))
+TRYB_SPECJALNY = RegisterDef("holding", 4224, burst=True, consumers=("thessla_select_{slave}_4224",))
+TRYB_KOMFORT = RegisterDef("holding", 4304, tier=TIER_SLOW, consumers=("thessla_komfort_select_{slave}_4304",))
+BYPASS = RegisterDef("holding", 4320, burst=True, consumers=("thessla_binary_sensor_{slave}_4320", "thessla_switch_{slave}_4320"))
+ON_OFF = RegisterDef("holding", 4387, burst=True, consumers=("thessla_switch_{slave}_4387",))
+STATUS_ERV = RegisterDef("holding", 4704, consumers=("thessla_binary_sensor_{slave}_4704",))
+TRYB_ERV = RegisterDef("holding", 4711, tier=TIER_SLOW, consumers=("thessla_erv_select_{slave}_4711",))
+
+# --- Alarmy i awarie (holding) ---
+ALARM = RegisterDef("holding", 8192, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8192",))
+ERROR = RegisterDef("holding", 8193, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8193",))
+FPX_ZABEZPIECZENIE = RegisterDef("holding", 8208, tier=TIER_FAST, consumers=("thessla_binary_sensor_{slave}_8208",))
+AWARIA_WENT_NAWIEW = RegisterDef("holding", 8222, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8222",))
+AWARIA_WENT_WYWIEW = RegisterDef("holding", 8223, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8223",))
+AWARIA_CF_NAWIEW = RegisterDef("holding", 8330, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8330",))
+AWARIA_CF_WYWIEW = RegisterDef("holding", 8331, tier=TIER_FAST, burst=True, consumers=("thessla_binary_sensor_{slave}_8331",))
+WYMIANA_FILTROW = RegisterDef("holding", 8444, tier=TIER_SLOW, consumers=("thessla_binary_sensor_{slave}_8444",))
+
+# --- Wejścia cyfrowe (coils) ---
+SILOWNIK_BYPASSU = RegisterDef("coil", 9, burst=True, consumers=("thessla_binary_sensor_{slave}_9",))
+POTWIERDZENIE_PRACY = RegisterDef("coil", 11, burst=True, consumers=("thessla_binary_sensor_{slave}_11",))
+
+REGISTERS: Tuple[RegisterDef, ...] = (
+    TEMP_CZERPNIA, TEMP_NAWIEW, TEMP_WYWIEW, TEMP_ZA_FPX, TEMP_PCB,
+    STRUMIEN_NAWIEW, STRUMIEN_WYWIEW,
+    FPX_FLAGA, FPX_TRYB, TRYB_PRACY, SEZON, PREDKOSC_RECZNA, TRYB_SPECJALNY, TRYB_KOMFORT,
+    BYPASS, ON_OFF, STATUS_ERV, TRYB_ERV,
+    ALARM, ERROR, FPX_ZABEZPIECZENIE, AWARIA_WENT_NAWIEW, AWARIA_WENT_WYWIEW,
+    AWARIA_CF_NAWIEW, AWARIA_CF_WYWIEW, WYMIANA_FILTROW,
+    SILOWNIK_BYPASSU, POTWIERDZENIE_PRACY,
+)
+
+REGISTER_MAP: Dict[Tuple[str, int], RegisterDef] = {register.key: register for register in REGISTERS}
+
+
+def wanted_addresses(registers: Iterable[RegisterDef] = REGISTERS) -> Dict[str, set[int]]:
+    """Adresy do odczytu per typ – tylko rejestry, które mają odbiorców."""
+    wanted: Dict[str, set[int]] = {"holding": set(), "input": set(), "coil": set()}
+    for register in registers:
+        if register.consumers:
+            wanted[register.kind].add(register.address)
+    return wanted
+
+
+def burst_addresses(registers: Iterable[RegisterDef] = REGISTERS) -> Dict[str, set[int]]:
+    """Adresy rejestrów przejściowych per typ – czytane dodatkowo w trybie burst."""
+    burst: Dict[str, set[int]] = {"holding": set(), "input": set(), "coil": set()}
+    for register in registers:
+        if register.burst:
+            burst[register.kind].add(register.address)
+    return burst
+
+
+def register_tiers(registers: Iterable[RegisterDef] = REGISTERS) -> Dict[Tuple[str, int], str]:
+    return {register.key: register.tier for register in registers}
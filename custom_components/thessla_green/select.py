@@ -7,6 +7,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 
 from . import DOMAIN
+from . import registers
 from .coordinator import ThesslaGreenCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -58,7 +59,7 @@ class RekuperatorTrybSelect(SelectEntity):
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
-        self._address = 4224
+        self._address = registers.TRYB_SPECJALNY.address
         self._slave = slave
         self._attr_name = "Rekuperator Tryb"
         self._attr_options = list(MODES.keys())
@@ -75,7 +76,7 @@ class RekuperatorTrybSelect(SelectEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def current_option(self) -> str | None:
@@ -85,6 +86,10 @@ class RekuperatorTrybSelect(SelectEntity):
             return None
         return self._value_map.get(value)
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         try:
@@ -93,9 +98,7 @@ class RekuperatorTrybSelect(SelectEntity):
                 _LOGGER.error(f"Unknown option selected: {option}")
                 return
 
-            success = await self.coordinator.controller.write_register(self._address, code)
-            if success:
-                await self.coordinator.async_request_refresh()
+            await self.coordinator.async_write_register(self._address, code)
 
         except Exception as e:
             _LOGGER.exception(f"Exception during tryb selection: {e}")
@@ -105,14 +108,16 @@ class RekuperatorTrybSelect(SelectEntity):
         pass
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self.async_write_ha_state, [("holding", self._address)]
+        ))
 
 class RekuperatorSezonSelect(SelectEntity):
     """Representation of Rekuperator Sezon Select."""
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
-        self._address = 4209
+        self._address = registers.SEZON.address
         self._slave = slave
         self._attr_name = "Rekuperator Sezon"
         self._attr_options = list(SEASONS.keys())
@@ -129,7 +134,7 @@ class RekuperatorSezonSelect(SelectEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def current_option(self) -> str | None:
@@ -139,6 +144,10 @@ class RekuperatorSezonSelect(SelectEntity):
             return None
         return self._value_map.get(value)
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         try:
@@ -147,9 +156,7 @@ class RekuperatorSezonSelect(SelectEntity):
                 _LOGGER.error(f"Unknown option selected: {option}")
                 return
 
-            success = await self.coordinator.controller.write_register(self._address, code)
-            if success:
-                await self.coordinator.async_request_refresh()
+            await self.coordinator.async_write_register(self._address, code)
 
         except Exception as e:
             _LOGGER.exception(f"Exception during sezon selection: {e}")
@@ -159,14 +166,16 @@ class RekuperatorSezonSelect(SelectEntity):
         pass
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self.async_write_ha_state, [("holding", self._address)]
+        ))
 
 class RekuperatorErvTrybSelect(SelectEntity):
     """Representation of ERV mode Select."""
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
-        self._address = 4711
+        self._address = registers.TRYB_ERV.address
         self._slave = slave
         self._attr_name = "Rekuperator ERV tryb"
         self._attr_options = list(ERV_MODES.keys())
@@ -183,7 +192,7 @@ class RekuperatorErvTrybSelect(SelectEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def current_option(self) -> str | None:
@@ -193,6 +202,10 @@ class RekuperatorErvTrybSelect(SelectEntity):
             return None
         return self._value_map.get(value)
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         try:
@@ -201,11 +214,7 @@ class RekuperatorErvTrybSelect(SelectEntity):
                 _LOGGER.error(f"Unknown ERV option selected: {option}")
                 return
 
-            success = await self.coordinator.controller.write_register(
-                self._address, code
-            )
-            if success:
-                await self.coordinator.async_request_refresh()
+            await self.coordinator.async_write_register(self._address, code)
 
         except Exception as e:
             _LOGGER.exception(f"Exception during ERV mode selection: {e}")
@@ -216,7 +225,7 @@ class RekuperatorErvTrybSelect(SelectEntity):
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_register_listener(self.async_write_ha_state, [("holding", self._address)])
         )
 
 
@@ -225,7 +234,7 @@ class RekuperatorKomfortSelect(SelectEntity):
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
-        self._address = 4304
+        self._address = registers.TRYB_KOMFORT.address
         self._slave = slave
         self._attr_name = "Rekuperator ECO/KOMFORT"
         self._attr_options = list(COMFORT_MODES.keys())
@@ -242,7 +251,7 @@ class RekuperatorKomfortSelect(SelectEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def current_option(self) -> str | None:
@@ -252,6 +261,10 @@ class RekuperatorKomfortSelect(SelectEntity):
             return None
         return self._value_map.get(value)
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         try:
@@ -260,11 +273,7 @@ class RekuperatorKomfortSelect(SelectEntity):
                 _LOGGER.error(f"Unknown ECO/KOMFORT option selected: {option}")
                 return
 
-            success = await self.coordinator.controller.write_register(
-                self._address, code
-            )
-            if success:
-                await self.coordinator.async_request_refresh()
+            await self.coordinator.async_write_register(self._address, code)
 
         except Exception as e:
             _LOGGER.exception(f"Exception during ECO/KOMFORT selection: {e}")
@@ -275,5 +284,5 @@ class RekuperatorKomfortSelect(SelectEntity):
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_register_listener(self.async_write_ha_state, [("holding", self._address)])
         )
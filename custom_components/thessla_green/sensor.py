@@ -1,31 +1,48 @@
 from __future__ import annotations
 import logging
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.const import UnitOfTemperature, UnitOfTime, EntityCategory
+import time
+from homeassistant.components.sensor import RestoreSensor, SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import UnitOfEnergy, UnitOfTemperature, UnitOfTime, EntityCategory
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
 
 from . import DOMAIN
+from .const import CONF_COP_INTERVAL, DEFAULT_COP_INTERVAL, ENERGY_WRITE_INTERVAL
+from .derived import TimeWeightedAverage
+from . import registers
+from .registers import RegisterDef
+from .circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
 from .modbus_controller import ThesslaGreenModbusController
 from .coordinator import ThesslaGreenCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Adres, typ, skala i grupa odpytywania pochodzą z mapy rejestrów (registers.py).
+# Martwa strefa: "deadband" (bezwzględna, w jednostce sensora) lub "deadband_pct" (% ostatnio zapisanej wartości) –
+# mniejsze zmiany nie są zapisywane jako nowy stan, najwyżej przez "max_silence" sekund
 SENSORS = [
     # Temperatura
-    {"name": "Rekuperator Temperatura Czerpnia", "address": 16, "input_type": "input", "scale": 0.1, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer"},
-    {"name": "Rekuperator Temperatura Nawiew", "address": 17, "input_type": "input", "scale": 0.1, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer"},
-    {"name": "Rekuperator Temperatura Wywiew", "address": 18, "input_type": "input", "scale": 0.1, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer"},
-    {"name": "Rekuperator Temperatura za FPX", "address": 19, "input_type": "input", "scale": 0.1, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer"},
-    {"name": "Rekuperator Temperatura PCB", "address": 22, "input_type": "input", "scale": 0.1, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:cpu-64-bit"},
+    {"name": "Rekuperator Temperatura Czerpnia", "register": registers.TEMP_CZERPNIA, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer", "deadband": 0.2, "max_silence": 900},
+    {"name": "Rekuperator Temperatura Nawiew", "register": registers.TEMP_NAWIEW, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer", "deadband": 0.2, "max_silence": 900},
+    {"name": "Rekuperator Temperatura Wywiew", "register": registers.TEMP_WYWIEW, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer", "deadband": 0.2, "max_silence": 900},
+    {"name": "Rekuperator Temperatura za FPX", "register": registers.TEMP_ZA_FPX, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:thermometer", "deadband": 0.2, "max_silence": 900},
+    {"name": "Rekuperator Temperatura PCB", "register": registers.TEMP_PCB, "precision": 1, "unit": UnitOfTemperature.CELSIUS, "icon": "mdi:cpu-64-bit", "deadband": 0.5, "max_silence": 1800},
     # Przepływy
-    {"name": "Rekuperator Strumień nawiew", "address": 256, "input_type": "holding", "scale": 1, "precision": 1, "unit": "m3/h", "icon": "mdi:fan"},
-    {"name": "Rekuperator Strumień wywiew", "address": 257, "input_type": "holding", "scale": 1, "precision": 1, "unit": "m3/h", "icon": "mdi:fan"},
+    {"name": "Rekuperator Strumień nawiew", "register": registers.STRUMIEN_NAWIEW, "precision": 1, "unit": "m3/h", "icon": "mdi:fan", "deadband_pct": 2, "max_silence": 900},
+    {"name": "Rekuperator Strumień wywiew", "register": registers.STRUMIEN_WYWIEW, "precision": 1, "unit": "m3/h", "icon": "mdi:fan", "deadband_pct": 2, "max_silence": 900},
     # Statusy i flagi
-    {"name": "Rekuperator tryb pracy", "address": 4208, "input_type": "holding", "icon": "mdi:cog"},
-    {"name": "Rekuperator speedmanual", "address": 4210, "input_type": "holding", "unit": "%", "icon": "mdi:speedometer"},
+    {"name": "Rekuperator tryb pracy", "register": registers.TRYB_PRACY, "icon": "mdi:cog"},
+    {"name": "Rekuperator speedmanual", "register": registers.PREDKOSC_RECZNA, "unit": "%", "icon": "mdi:speedometer"},
+]
+
+# Diagnostyka czasów komunikacji – klucze z ControllerMetrics.summary()
+METRIC_SENSORS = [
+    {"name": "Modbus Cycle Time p50", "key": "cycle_p50_ms", "unit": UnitOfTime.MILLISECONDS, "icon": "mdi:timer-outline"},
+    {"name": "Modbus Cycle Time p95", "key": "cycle_p95_ms", "unit": UnitOfTime.MILLISECONDS, "icon": "mdi:timer-alert-outline", "details": True},
+    {"name": "Modbus Error Rate", "key": "error_rate", "unit": "%", "icon": "mdi:alert-circle-outline"},
+    {"name": "Modbus Lock Wait p95", "key": "lock_wait_p95_ms", "unit": UnitOfTime.MILLISECONDS, "icon": "mdi:lock-clock"},
 ]
 
 async def async_setup_entry(
@@ -44,6 +61,13 @@ async def async_setup_entry(
 
     # Dodaj sensor diagnostyczny
     entities.append(ModbusUpdateIntervalSensor(coordinator=coordinator, slave=slave))
+    entities.append(ModbusReadSpeedupSensor(coordinator=coordinator, slave=slave))
+    entities.append(ModbusCircuitBreakerSensor(coordinator=coordinator, slave=slave))
+    entities.append(ModbusNextProbeSensor(coordinator=coordinator, slave=slave))
+    entities.extend(
+        ModbusMetricSensor(coordinator=coordinator, slave=slave, **metric)
+        for metric in METRIC_SENSORS
+    )
 
     # Metryki obliczane
     power_entity = entry.options.get("sensor_power")  # W lub kW
@@ -53,7 +77,11 @@ async def async_setup_entry(
     entities.extend([
         RekuEfficiencySensor(coordinator=coordinator, slave=slave),
         RekuRecoveryPowerSensor(coordinator=coordinator, slave=slave),
-        RekuCOPSensor(coordinator=coordinator, slave=slave, power_entity=power_entity),
+        RekuCOPSensor(
+            coordinator=coordinator, slave=slave, power_entity=power_entity,
+            min_interval=entry.options.get(CONF_COP_INTERVAL, DEFAULT_COP_INTERVAL),
+        ),
+        RekuRecoveredEnergySensor(coordinator=coordinator, slave=slave),
     ])
 
     async_add_entities(entities)
@@ -61,11 +89,14 @@ async def async_setup_entry(
 class ModbusGenericSensor(SensorEntity):
     """Representation of a standard Modbus sensor."""
 
-    def __init__(self, coordinator: ThesslaGreenCoordinator, name, address, input_type="holding", scale=1.0, precision=0, unit=None, icon=None, slave=1):
+    def __init__(
+        self, coordinator: ThesslaGreenCoordinator, name, register: RegisterDef, precision=0, unit=None, icon=None, slave=1,
+        deadband=0.0, deadband_pct=0.0, max_silence=None,
+    ):
         self.coordinator = coordinator
-        self._address = address
-        self._input_type = input_type
-        self._scale = scale
+        self._register = register
+        self._address = register.address
+        self._input_type = register.kind
         self._precision = precision
         self._unit = unit
         self._slave = slave
@@ -73,7 +104,14 @@ class ModbusGenericSensor(SensorEntity):
         self._attr_native_unit_of_measurement = unit
         self._attr_native_value = None
         self._attr_icon = icon
-        self._attr_unique_id = f"thessla_sensor_{slave}_{address}"
+        self._attr_unique_id = f"thessla_sensor_{slave}_{register.address}"
+
+        # Martwa strefa względem ostatnio zapisanego stanu
+        self._deadband = deadband
+        self._deadband_pct = deadband_pct
+        self._max_silence = max_silence
+        self._written: tuple | None = None
+        self._written_at = 0.0
 
         self._attr_device_info = {
             "identifiers": {(DOMAIN, f"{slave}")},
@@ -84,32 +122,52 @@ class ModbusGenericSensor(SensorEntity):
 
     @property
     def available(self):
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([(self._input_type, self._address)])
 
     @property
     def native_value(self):
-        if self._input_type == "input":
-            raw_value = self.coordinator.safe_data.input.get(self._address)
-        else:
-            raw_value = self.coordinator.safe_data.holding.get(self._address)
-
-        if raw_value is None:
+        value = self._register.decode(getattr(self.coordinator.safe_data, self._input_type).get(self._address))
+        if value is None:
             return None
-
-        # Konwersja na signed int16
-        raw = raw_value
-        if raw > 0x7FFF:
-            raw -= 0x10000
-
-        value = raw * self._scale
         return round(value, self._precision)
 
+    @property
+    def extra_state_attributes(self):
+        # Wartość z migawki zapisanej przed restartem – do pierwszego odczytu z urządzenia
+        return {"restored": True} if self.coordinator.safe_data.restored else None
+
     async def async_update(self):
         # Brak potrzeby ręcznego update — coordinator steruje
         pass
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self._handle_coordinator_update, [(self._input_type, self._address)]
+        ))
+
+    @callback
+    def _handle_coordinator_update(self):
+        value, available, restored = self.native_value, self.available, self.coordinator.safe_data.restored
+        if self._written is not None and self._within_deadband(value, available, restored):
+            return
+        self.async_write_ha_state()
+
+    def _within_deadband(self, value, available, restored) -> bool:
+        written_value, written_available, written_restored = self._written
+        # Zmiana dostępności lub koniec danych odtworzonych (atrybut "restored") zawsze jest zapisywana
+        if available != written_available or restored != written_restored or value is None or written_value is None:
+            return False
+        if self._max_silence is not None and time.monotonic() - self._written_at >= self._max_silence:
+            return False
+        threshold = max(self._deadband, abs(written_value) * self._deadband_pct / 100)
+        # Różnica zaokrąglona do precyzji sensora – 21.3 - 21.1 to w float 0.1999…, a nie 0.2
+        return round(abs(value - written_value), self._precision) < threshold
+
+    @callback
+    def async_write_ha_state(self):
+        self._written = (self.native_value, self.available, self.coordinator.safe_data.restored)
+        self._written_at = time.monotonic()
+        super().async_write_ha_state()
 
 class ModbusUpdateIntervalSensor(SensorEntity):
     """Diagnostic sensor showing time between full Modbus updates."""
@@ -138,6 +196,15 @@ class ModbusUpdateIntervalSensor(SensorEntity):
     def native_value(self):
         return self.coordinator.safe_data.update_interval
 
+    @property
+    def extra_state_attributes(self):
+        return {
+            "failed_blocks": list(self.coordinator.safe_data.failed_blocks),
+            "deferred_blocks": list(self.coordinator.safe_data.deferred_blocks),
+            "burst": self.coordinator.bursting,
+            "restored": self.coordinator.safe_data.restored,
+        }
+
     async def async_update(self):
         # Niepotrzebne — wszystko przez coordinator
         pass
@@ -145,13 +212,157 @@ class ModbusUpdateIntervalSensor(SensorEntity):
     async def async_added_to_hass(self):
         self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
 
+class ModbusReadSpeedupSensor(SensorEntity):
+    """Diagnostic sensor showing how much faster a poll cycle is than the sum of its requests."""
+
+    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
+        self.coordinator = coordinator
+        self._slave = slave
+        self._attr_name = "Modbus Read Speed-up"
+        self._attr_native_unit_of_measurement = "x"
+        self._attr_unique_id = f"thessla_read_speedup_{slave}"
+        self._attr_icon = "mdi:speedometer"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{slave}")},
+            "name": "Rekuperator Thessla",
+            "manufacturer": "Thessla Green",
+            "model": "Modbus Rekuperator",
+        }
+
+    @property
+    def available(self):
+        return self.coordinator.last_update_success
+
+    @property
+    def native_value(self):
+        return self.coordinator.safe_data.read_speedup
+
+    @property
+    def extra_state_attributes(self):
+        return {"mode": "pipelined" if self.coordinator.safe_data.pipelined else "serial"}
+
+    async def async_update(self):
+        pass
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
+class ModbusCircuitBreakerSensor(SensorEntity):
+    """Diagnostic sensor showing the state of the Modbus connection circuit breaker."""
+
+    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
+        self.coordinator = coordinator
+        self._slave = slave
+        self._attr_name = "Modbus Circuit Breaker"
+        self._attr_unique_id = f"thessla_circuit_breaker_{slave}"
+        self._attr_icon = "mdi:electric-switch"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_options = [STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN]
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{slave}")},
+            "name": "Rekuperator Thessla",
+            "manufacturer": "Thessla Green",
+            "model": "Modbus Rekuperator",
+        }
+
+    @property
+    def native_value(self):
+        return self.coordinator.controller.breaker.state
+
+    async def async_update(self):
+        pass
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
+class ModbusNextProbeSensor(SensorEntity):
+    """Diagnostic sensor showing time until the next connection probe while the breaker is open."""
+
+    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
+        self.coordinator = coordinator
+        self._slave = slave
+        self._attr_name = "Modbus Next Probe In"
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_unique_id = f"thessla_next_probe_{slave}"
+        self._attr_icon = "mdi:timer-sand"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{slave}")},
+            "name": "Rekuperator Thessla",
+            "manufacturer": "Thessla Green",
+            "model": "Modbus Rekuperator",
+        }
+
+    @property
+    def native_value(self):
+        return self.coordinator.controller.breaker.seconds_until_probe
+
+    async def async_update(self):
+        pass
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
+class ModbusMetricSensor(SensorEntity):
+    """Diagnostic sensor publishing one rolling timing/error statistic of the Modbus controller."""
+
+    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int, name, key, unit=None, icon=None, details=False):
+        self.coordinator = coordinator
+        self._slave = slave
+        self._key = key
+        self._details = details
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_unique_id = f"thessla_metric_{key}_{slave}"
+        self._attr_icon = icon
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{slave}")},
+            "name": "Rekuperator Thessla",
+            "manufacturer": "Thessla Green",
+            "model": "Modbus Rekuperator",
+        }
+
+    @property
+    def native_value(self):
+        return self.coordinator.controller.metrics.summary()[self._key]
+
+    @property
+    def extra_state_attributes(self):
+        if not self._details:
+            return None
+        # Opóźnienia i błędy per blok / kod funkcji – pozwalają wskazać wolny zakres rejestrów lub bramkę
+        summary = self.coordinator.controller.metrics.summary()
+        return {
+            "gateway": self.coordinator.controller.gateway.name,
+            "slowest_block": summary["slowest_block"],
+            "bus_wait_p95_ms": summary["bus_wait_p95_ms"],
+            "retries": summary["retries"],
+            "blocks": summary["blocks"],
+            "errors": summary["errors"],
+        }
+
+    async def async_update(self):
+        pass
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
 # =============================
 #  Metryki: sprawność / moc / COP
 # =============================
 
 class _BaseComputedSensor(SensorEntity):
-    """Baza dla sensorów liczonych z koordynatora."""
+    """Baza dla sensorów liczonych – wartości wylicza raz na cykl koordynator (coordinator.derived)."""
     _attr_should_poll = False
+    # Rejestry (typ, adres), z których liczona jest wartość – tylko ich zmiana wywołuje przeliczenie
+    _registers: tuple[tuple[str, int], ...] = ()
 
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         self.coordinator = coordinator
@@ -166,46 +377,22 @@ class _BaseComputedSensor(SensorEntity):
 
     @property
     def available(self):
-        return self.coordinator.last_update_success and self._attr_native_value is not None
+        return self.coordinator.registers_fresh(self._registers) and self._attr_native_value is not None
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self._handle_coordinator_update))
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self._handle_coordinator_update, self._registers
+        ))
         self._recalc()
         self.async_write_ha_state()
 
     @callback
     def _handle_coordinator_update(self):
+        previous = (self._attr_native_value, self.available)
         self._recalc()
-        self.async_write_ha_state()
-
-    # Helpers (adresy „na sztywno” wg Twoich definicji):
-    def _read_temp_czerpnia(self) -> float | None:
-        return self._read_input_scaled(addr=16, scale=0.1, precision=1)
-
-    def _read_temp_nawiew(self) -> float | None:
-        return self._read_input_scaled(addr=17, scale=0.1, precision=1)
-
-    def _read_temp_wywiew(self) -> float | None:
-        return self._read_input_scaled(addr=18, scale=0.1, precision=1)
-
-    def _read_flow_nawiew(self) -> float | None:
-        return self._read_holding_scaled(addr=256, scale=1.0)
-
-    def _read_input_scaled(self, addr: int, scale: float, precision: int) -> float | None:
-        raw = self.coordinator.safe_data.input.get(addr)
-        if raw is None:
-            return None
-        if raw > 0x7FFF:
-            raw -= 0x10000
-        return round(raw * scale, precision)
-
-    def _read_holding_scaled(self, addr: int, scale: float) -> float | None:
-        raw = self.coordinator.safe_data.holding.get(addr)
-        if raw is None:
-            return None
-        if raw > 0x7FFF:
-            raw -= 0x10000
-        return float(raw) * scale
+        # Histereza w koordynatorze często zostawia wartość bez zmian – wtedy nie ma czego zapisywać
+        if (self._attr_native_value, self.available) != previous:
+            self.async_write_ha_state()
 
     def _recalc(self):
         raise NotImplementedError
@@ -213,6 +400,8 @@ class _BaseComputedSensor(SensorEntity):
 
 class RekuEfficiencySensor(_BaseComputedSensor):
     """Sprawność [%] = ((Tnawiew - Tczerpnia) / (Twywiew - Tczerpnia)) * 100"""
+    _registers = (registers.TEMP_CZERPNIA.key, registers.TEMP_NAWIEW.key, registers.TEMP_WYWIEW.key)
+
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         super().__init__(coordinator, slave)
         self._attr_name = "Rekuperator Sprawność"
@@ -220,22 +409,19 @@ class RekuEfficiencySensor(_BaseComputedSensor):
         self._attr_icon = "mdi:percent"
         self._attr_native_unit_of_measurement = "%"
 
+    @property
+    def extra_state_attributes(self):
+        derived = self.coordinator.derived
+        return {"delta_t": derived.delta_t, "delta_available": derived.delta_available}
+
     def _recalc(self):
-        To = self._read_temp_czerpnia()
-        Te = self._read_temp_wywiew()
-        Ts = self._read_temp_nawiew()
-        if None in (To, Te, Ts):
-            self._attr_native_value = None
-            return
-        denom = Te - To
-        if abs(denom) < 0.5:
-            self._attr_native_value = None
-            return
-        self._attr_native_value = round(((Ts - To) / denom) * 100.0, 1)
+        self._attr_native_value = self.coordinator.derived.efficiency
 
 
 class RekuRecoveryPowerSensor(_BaseComputedSensor):
     """Moc odzysku [kW] ≈ 0.000335 * V[m3/h] * ΔT[°C]"""
+    _registers = (registers.TEMP_CZERPNIA.key, registers.TEMP_NAWIEW.key, registers.STRUMIEN_NAWIEW.key)
+
     def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
         super().__init__(coordinator, slave)
         self._attr_name = "Rekuperator Moc Odzysku"
@@ -244,20 +430,21 @@ class RekuRecoveryPowerSensor(_BaseComputedSensor):
         self._attr_native_unit_of_measurement = "kW"
 
     def _recalc(self):
-        To = self._read_temp_czerpnia()
-        Ts = self._read_temp_nawiew()
-        flow = self._read_flow_nawiew()  # m3/h
-        if None in (To, Ts) or flow is None or flow <= 0:
-            self._attr_native_value = None
-            return
-        q_kw = 0.000335 * flow * (Ts - To)
-        self._attr_native_value = round(q_kw, 3)
+        self._attr_native_value = self.coordinator.derived.recovery_power
 
 
 class RekuCOPSensor(_BaseComputedSensor):
-    """COP = (moc odzysku [kW]) / (pobór elektryczny [kW]) – bez jednostki"""
+    """COP = (moc odzysku [kW]) / (średni pobór elektryczny [kW]) – bez jednostki
 
-    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int, power_entity: str | None):
+    Przeliczany najwyżej co ``min_interval`` sekund; moc to średnia ważona czasem ze wszystkich
+    zmian sensora mocy od poprzedniego przeliczenia, a nie tylko ostatnia próbka.
+    """
+    _registers = (registers.TEMP_CZERPNIA.key, registers.TEMP_NAWIEW.key, registers.STRUMIEN_NAWIEW.key)
+
+    def __init__(
+        self, coordinator: ThesslaGreenCoordinator, slave: int, power_entity: str | None,
+        min_interval: float = DEFAULT_COP_INTERVAL,
+    ):
         super().__init__(coordinator, slave)
         self._attr_name = "Rekuperator COP"
         self._attr_unique_id = f"thessla_cop_{slave}"
@@ -266,6 +453,12 @@ class RekuCOPSensor(_BaseComputedSensor):
         self._power_entity = power_entity
         self._last_power_val = None
         self._last_power_unit = None
+        self._min_interval = max(0.0, min_interval)
+        self._power = TimeWeightedAverage()
+        self._power_average: float | None = None
+        self._power_samples = 0
+        self._last_calc = float("-inf")
+        self._recalc_unsub = None
 
     @property
     def extra_state_attributes(self):
@@ -273,16 +466,20 @@ class RekuCOPSensor(_BaseComputedSensor):
             "power_entity": self._power_entity,
             "power_value_raw": self._last_power_val,
             "power_unit": self._last_power_unit,
+            "power_average_kw": None if self._power_average is None else round(self._power_average, 3),
+            "power_samples": self._power_samples,
         }
 
     async def async_added_to_hass(self):
+        if self._power_entity:
+            self._power.add(time.monotonic(), self._read_power_kw())
         await super().async_added_to_hass()
         # nasłuch zmian sensora mocy - BEZPIECZNIE w event loop
         if self._power_entity:
             @callback
             def _on_power_change(event):
-                self._recalc()
-                self.async_write_ha_state()
+                self._power.add(time.monotonic(), self._power_kw_from_state(event.data.get("new_state")))
+                self._request_recalc()
 
             unsub = async_track_state_change_event(
                 self.hass,
@@ -290,12 +487,41 @@ class RekuCOPSensor(_BaseComputedSensor):
                 _on_power_change,
             )
             self.async_on_remove(unsub)
+        self.async_on_remove(self._cancel_scheduled_recalc)
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._request_recalc()
+
+    @callback
+    def _request_recalc(self):
+        """Przelicza od razu albo – gdy od poprzedniego przeliczenia minęło za mało czasu – raz, na koniec okna."""
+        if self._recalc_unsub is not None:
+            return
+        delay = self._last_calc + self._min_interval - time.monotonic()
+        if delay <= 0:
+            super()._handle_coordinator_update()
+            return
+        self._recalc_unsub = async_call_later(self.hass, delay, self._scheduled_recalc)
+
+    @callback
+    def _scheduled_recalc(self, _now):
+        self._recalc_unsub = None
+        super()._handle_coordinator_update()
+
+    @callback
+    def _cancel_scheduled_recalc(self):
+        if self._recalc_unsub is not None:
+            self._recalc_unsub()
+            self._recalc_unsub = None
 
     def _read_power_kw(self) -> float | None:
         """Czyta sensor mocy z HA, zwraca w kW (auto-konwersja W→kW)."""
         if not self._power_entity:
             return None
-        st = self.hass.states.get(self._power_entity)
+        return self._power_kw_from_state(self.hass.states.get(self._power_entity))
+
+    def _power_kw_from_state(self, st) -> float | None:
         if not st:
             return None
 
@@ -326,14 +552,57 @@ class RekuCOPSensor(_BaseComputedSensor):
         return val
 
     def _recalc(self):
-        To = self._read_temp_czerpnia()
-        Ts = self._read_temp_nawiew()
-        flow = self._read_flow_nawiew()
-        p_kw = self._read_power_kw()
+        now = time.monotonic()
+        self._last_calc = now
+        self._power_samples = self._power.samples
+        self._power_average = self._power.take(now)
+        self._attr_native_value = self.coordinator.derived.cop(self._power_average)
+        if self.available:
+            self.coordinator.async_record_statistic("cop", self._attr_native_value)
+
+
+class RekuRecoveredEnergySensor(_BaseComputedSensor, RestoreSensor):
+    """Energia odzysku [kWh] – całka mocy odzysku liczona w koordynatorze, stan odtwarzany po restarcie."""
+    _registers = (registers.TEMP_CZERPNIA.key, registers.TEMP_NAWIEW.key, registers.STRUMIEN_NAWIEW.key)
+
+    def __init__(self, coordinator: ThesslaGreenCoordinator, slave: int):
+        super().__init__(coordinator, slave)
+        self._attr_name = "Rekuperator Energia Odzysku"
+        self._attr_unique_id = f"thessla_recovered_energy_{slave}"
+        self._attr_icon = "mdi:home-thermometer"
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._last_write = 0.0
+
+    @property
+    def available(self):
+        # Licznik narastający pozostaje dostępny – przerwa w danych po prostu nie dodaje energii
+        return True
 
-        if None in (To, Ts) or flow is None or flow <= 0 or p_kw is None or p_kw <= 0:
-            self._attr_native_value = None
+    @property
+    def native_value(self):
+        # Zawsze bieżąca suma – także w stanie zapisywanym przez RestoreEntity przy zatrzymaniu HA
+        return round(self.coordinator.derived.recovered_energy, 3)
+
+    async def async_added_to_hass(self):
+        last = await self.async_get_last_sensor_data()
+        if last is not None and last.native_value is not None:
+            try:
+                self.coordinator.restore_recovered_energy(float(last.native_value))
+            except (TypeError, ValueError):
+                _LOGGER.warning("Cannot restore recovered energy from '%s'", last.native_value)
+        self._last_write = time.monotonic()
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self):
+        # Licznik rośnie co cykl, ale stan zapisujemy najwyżej co ENERGY_WRITE_INTERVAL sekund
+        now = time.monotonic()
+        if now - self._last_write < ENERGY_WRITE_INTERVAL:
             return
+        self._last_write = now
+        self.async_write_ha_state()
 
-        q_kw = 0.000335 * flow * (Ts - To)
-        self._attr_native_value = round(q_kw / p_kw, 2) if q_kw > 0 else None
\ No newline at end of file
+    def _recalc(self):
+        pass
@@ -0,0 +1,59 @@
+"""Usługi integracji (thessla_green.*)."""
+from __future__ import annotations
+
+import time
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SERVICE_GET_HISTORY
+from .history import summarize
+from .registers import REGISTER_MAP
+
+GET_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional("kind", default="holding"): vol.In(("holding", "input", "coil")),
+    vol.Required("address"): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+    # Ostatnie N sekund; bez okna – cały bufor
+    vol.Optional("window"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional("slave"): vol.All(vol.Coerce(int), vol.Range(min=1, max=247)),
+    vol.Optional("samples", default=True): cv.boolean,
+})
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Rejestruje usługi domeny (raz, niezależnie od liczby wpisów konfiguracji)."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_HISTORY):
+        return
+
+    async def _async_get_history(call: ServiceCall) -> ServiceResponse:
+        kind, address = call.data["kind"], call.data["address"]
+        register = REGISTER_MAP.get((kind, address))
+        if register is None:
+            raise ServiceValidationError(f"Register {kind} {address} is not in the register map")
+
+        since = time.time() - call.data["window"] if "window" in call.data else None
+        devices = []
+        for entry_data in hass.data.get(DOMAIN, {}).values():
+            slave = entry_data["slave"]
+            if call.data.get("slave", slave) != slave:
+                continue
+            samples = entry_data["coordinator"].history.samples(kind, address, since)
+            device = {"slave": slave, "kind": kind, "address": address, **summarize(samples)}
+            if call.data["samples"]:
+                device["samples"] = [
+                    [dt_util.utc_from_timestamp(stamp).isoformat(), value] for stamp, value in samples
+                ]
+            devices.append(device)
+        return {"devices": devices}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        _async_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
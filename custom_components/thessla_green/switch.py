@@ -7,14 +7,16 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.config_entries import ConfigEntry
 
 from . import DOMAIN
+from . import registers
+from .registers import RegisterDef
 from .coordinator import ThesslaGreenCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
 SWITCHES = [
-    {"name": "Rekuperator bypass", "address": 4320, "command_on": 0, "command_off": 1, "verify": True},
-    {"name": "Rekuperator ON/OFF", "address": 4387, "command_on": 1, "command_off": 0, "verify": True},
-    {"name": "Rekuperator mode", "address": 4208, "command_on": 0, "command_off": 1, "verify": True},
+    {"name": "Rekuperator bypass", "register": registers.BYPASS, "command_on": 0, "command_off": 1, "verify": True},
+    {"name": "Rekuperator ON/OFF", "register": registers.ON_OFF, "command_on": 1, "command_off": 0, "verify": True},
+    {"name": "Rekuperator mode", "register": registers.TRYB_PRACY, "command_on": 0, "command_off": 1, "verify": True},
 ]
 
 async def async_setup_entry(
@@ -41,21 +43,21 @@ class ModbusSwitch(SwitchEntity):
         self,
         coordinator: ThesslaGreenCoordinator,
         name: str,
-        address: int,
+        register: RegisterDef,
         command_on: int,
         command_off: int,
         verify: bool = False,
         slave: int = 1,
     ):
         self.coordinator = coordinator
-        self._address = address
+        self._address = register.address
         self._command_on = command_on
         self._command_off = command_off
         self._verify = verify
         self._slave = slave
 
         self._attr_name = name
-        self._attr_unique_id = f"thessla_switch_{slave}_{address}"
+        self._attr_unique_id = f"thessla_switch_{slave}_{register.address}"
 
         self._attr_device_info = {
             "identifiers": {(DOMAIN, f"{slave}")},
@@ -66,7 +68,7 @@ class ModbusSwitch(SwitchEntity):
 
     @property
     def available(self) -> bool:
-        return self.coordinator.last_update_success
+        return self.coordinator.registers_fresh([("holding", self._address)])
 
     @property
     def is_on(self) -> bool | None:
@@ -76,25 +78,26 @@ class ModbusSwitch(SwitchEntity):
             return None
         return value == self._command_on
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.register_attributes(self._address)
+
     async def async_turn_on(self, **kwargs) -> None:
         """Turn the switch on."""
         try:
-            success = await self.coordinator.controller.write_register(self._address, self._command_on)
-            if success and not self._verify:
-                self.async_write_ha_state()
-            elif self._verify:
-                await self.coordinator.async_request_refresh()
+            # Koordynator od razu nanosi zapisaną wartość; z verify potwierdza ją odczyt zwrotny rejestru
+            result = await self.coordinator.async_write_register(self._address, self._command_on, verify=self._verify)
+            if not result.success:
+                _LOGGER.warning("Device did not confirm turning on %s", self._attr_name)
         except Exception as e:
             _LOGGER.exception(f"Error turning on {self._attr_name}: {e}")
 
     async def async_turn_off(self, **kwargs) -> None:
         """Turn the switch off."""
         try:
-            success = await self.coordinator.controller.write_register(self._address, self._command_off)
-            if success and not self._verify:
-                self.async_write_ha_state()
-            elif self._verify:
-                await self.coordinator.async_request_refresh()
+            result = await self.coordinator.async_write_register(self._address, self._command_off, verify=self._verify)
+            if not result.success:
+                _LOGGER.warning("Device did not confirm turning off %s", self._attr_name)
         except Exception as e:
             _LOGGER.exception(f"Error turning off {self._attr_name}: {e}")
 
@@ -105,4 +108,6 @@ class ModbusSwitch(SwitchEntity):
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
\ No newline at end of file
+        self.async_on_remove(self.coordinator.async_add_register_listener(
+            self.async_write_ha_state, [("holding", self._address)]
+        ))
\ No newline at end of file
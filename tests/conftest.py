@@ -0,0 +1,37 @@
+"""Testy modułów kontrolera na lokalnym symulatorze AirPack – bez Home Assistant.
+
+Uruchomienie (potrzebny tylko pymodbus i pytest)::
+
+    python -m pytest tests
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+try:
+    import homeassistant  # noqa: F401
+except ImportError:
+    # __init__ integracji importuje Home Assistant – pakiet bez niego, moduły kontrolera nie zależą od HA
+    _package = types.ModuleType("custom_components.thessla_green")
+    _package.__path__ = [str(ROOT / "custom_components" / "thessla_green")]
+    sys.modules[_package.__name__] = _package
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Testy ``async def`` uruchamiane w nowej pętli (bez pytest-asyncio)."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in inspect.signature(pyfuncitem.obj).parameters}
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
@@ -0,0 +1,36 @@
+from custom_components.thessla_green.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+def test_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=2, base_delay=60)
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+    assert 30 <= breaker.seconds_until_probe <= 60
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("test", failure_threshold=1, base_delay=0)
+    breaker.record_failure()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+    assert breaker.probing
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED and breaker.allow_request()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=3, base_delay=60)
+    breaker._open()
+    breaker._next_probe = 0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
@@ -0,0 +1,49 @@
+import pytest
+
+from custom_components.thessla_green.const import ENERGY_MAX_GAP
+from custom_components.thessla_green.derived import EnergyIntegrator, TimeWeightedAverage
+
+
+def test_time_weighted_average():
+    average = TimeWeightedAverage()
+    average.add(0, 1.0)
+    average.add(10, 3.0)
+    assert average.samples == 2
+    assert average.take(20) == pytest.approx(2.0)
+    # Ostatnia wartość trwa w następnym oknie
+    assert average.take(30) == pytest.approx(3.0)
+
+
+def test_time_weighted_average_skips_unknown_periods():
+    average = TimeWeightedAverage()
+    assert average.take(0) is None
+    average.add(0, 2.0)
+    average.add(10, None)
+    average.add(20, 4.0)
+    assert average.take(30) == pytest.approx(3.0)
+
+
+def test_energy_integrator():
+    energy = EnergyIntegrator()
+    energy.add(0, 1.0)
+    energy.add(300, 1.0)
+    assert energy.total == pytest.approx(300 / 3600)
+    # Ujemna moc nie zmniejsza sumy, a przerwa dłuższa niż ENERGY_MAX_GAP nie jest mostkowana
+    energy.add(600, -1.0)
+    energy.add(600 + ENERGY_MAX_GAP + 1, 5.0)
+    assert energy.total == pytest.approx(300 / 3600 + 150 / 3600)
+    energy.restore(2.0)
+    assert energy.total == pytest.approx(2.0 + 450 / 3600)
+
+
+def test_energy_integrator_restores_once():
+    energy = EnergyIntegrator()
+    energy.add(0, 1.0)
+    energy.add(360, 1.0)
+    energy.restore(2.0)
+    # Encja dodana ponownie (zmiana entity_id, wyłączenie/włączenie) podaje własny, już zawierający ją stan
+    energy.restore(energy.total)
+    assert energy.total == pytest.approx(2.1)
+    energy.add(720, 1.0)
+    energy.restore(5.0)
+    assert energy.total == pytest.approx(2.2)
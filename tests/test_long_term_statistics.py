@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.thessla_green.long_term_statistics import HOUR, HourlyAggregator  # noqa: E402
+
+
+def test_hour_in_progress_survives_a_restart():
+    start = 100 * HOUR
+    before = HourlyAggregator()
+    before.add_value("efficiency", 80, start + 10)
+    before.add_value("efficiency", 90, start + 20)
+    saved = json.loads(json.dumps(before.export()))
+
+    after = HourlyAggregator()
+    after.restore(saved, start + 30)
+    after.add_value("efficiency", 70, start + 40)
+    after.add_value("efficiency", 50, start + HOUR)
+    [bucket] = after.take_pending()["efficiency"]
+    assert (bucket.start, bucket.count, bucket.min, bucket.max) == (start, 3, 70, 90)
+    assert bucket.total / bucket.count == pytest.approx(80)
+
+
+def test_completed_hour_from_the_snapshot_is_imported():
+    start = 100 * HOUR
+    before = HourlyAggregator()
+    before.add_value("cop", 3.0, start + 10)
+
+    after = HourlyAggregator()
+    after.restore(before.export(), start + HOUR + 10)
+    assert after.has_pending
+    [bucket] = after.take_pending()["cop"]
+    assert bucket.start == start and bucket.count == 1
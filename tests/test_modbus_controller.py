@@ -0,0 +1,175 @@
+import asyncio
+from collections import Counter
+from dataclasses import replace
+
+from airpack_simulator import AirPackSimulator
+import pytest
+
+from custom_components.thessla_green.const import TIER_FAST
+from custom_components.thessla_green.modbus_controller import ControllerException, ThesslaGreenModbusController
+from custom_components.thessla_green.register_image import RegisterImage
+from custom_components.thessla_green.registers import TEMP_PCB
+
+FC_WRITE_SINGLE = 6
+FC_WRITE_MULTIPLE = 16
+
+
+def _record_blocks(controller: ThesslaGreenModbusController) -> list:
+    blocks = []
+    read_block = controller._read_block
+
+    async def _read_block(kind, start, count):
+        blocks.append((kind, start, count))
+        return await read_block(kind, start, count)
+
+    controller._read_block = _read_block
+    return blocks
+
+
+async def test_full_cycle_reads_every_register_once():
+    async with AirPackSimulator() as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10)
+        try:
+            blocks = _record_blocks(controller)
+            data = await controller.fetch_data()
+            assert not data.failed_blocks
+            assert sim.stats.total_requests == len(blocks) == 10
+            read = Counter((kind, start + i) for kind, start, count in blocks for i in range(count))
+            assert max(read.values()) == 1
+            assert data.input.get(16) == sim.registers(10, "input")[16]
+
+            sim.stats.reset()
+            await controller.fetch_data({TIER_FAST})
+            assert sim.stats.total_requests == 3
+        finally:
+            await controller.stop()
+
+
+async def test_pipelined_reads_do_not_wait_under_the_request_timeout():
+    async with AirPackSimulator(latency=0.3) as sim:
+        serial = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, pipeline_window=1, request_timeout=0.5)
+        try:
+            data = await serial.fetch_data()
+            assert not data.failed_blocks and not data.pipelined
+            assert sim.stats.max_in_flight == 1
+        finally:
+            await serial.stop()
+
+        # Okno 4 przy limicie 0.5 s: zapytanie czekające na połączenie nie może przekroczyć limitu
+        pipelined = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, pipeline_window=4, request_timeout=0.5)
+        try:
+            sim.stats.reset()
+            data = await pipelined.fetch_data()
+            assert not data.failed_blocks and data.pipelined
+            assert sim.stats.total_requests == 10
+            assert 1 < sim.stats.max_in_flight <= 4
+            assert pipelined.metrics.summary()["requests"] == 10
+        finally:
+            await pipelined.stop()
+
+
+async def test_pipelining_falls_back_when_gateway_refuses_connections():
+    async with AirPackSimulator(latency=0.02, max_connections=1) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, pipeline_window=4, request_timeout=1)
+        try:
+            for _ in range(3):
+                data = await controller.fetch_data()
+                assert not data.failed_blocks
+            assert not controller.pipelined
+        finally:
+            await controller.stop()
+
+
+async def test_budget_defers_blocks_to_the_next_cycle():
+    async with AirPackSimulator(latency=0.05) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10)
+        try:
+            deferred = await controller.fetch_data(budget=0.12)
+            assert deferred.deferred_blocks
+            blocks = _record_blocks(controller)
+            await controller.fetch_data(set())
+            first = {f"{kind} {start}-{start + count - 1}" for kind, start, count in blocks}
+            assert first == set(deferred.deferred_blocks)
+        finally:
+            await controller.stop()
+
+
+async def test_disabled_consumers_are_applied_between_cycles():
+    async with AirPackSimulator(latency=0.05) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, pipeline_window=4)
+        try:
+            await controller.fetch_data()
+            cycle = asyncio.ensure_future(controller.fetch_data())
+            await asyncio.sleep(0.02)
+            # Zmiana z rejestru encji w trakcie cyklu – bloki w locie trafiają jeszcze do starego obrazu
+            controller.set_disabled_consumers(TEMP_PCB.unique_ids(10))
+            data = await cycle
+            assert not data.failed_blocks
+
+            blocks = _record_blocks(controller)
+            data = await controller.fetch_data()
+            assert not data.failed_blocks
+            assert ("input", 16, 4) in blocks
+            assert TEMP_PCB.address not in data.input
+        finally:
+            await controller.stop()
+
+
+def test_read_outside_the_plan_is_a_block_failure():
+    controller = ThesslaGreenModbusController.__new__(ThesslaGreenModbusController)
+    with pytest.raises(ControllerException):
+        controller._fill(RegisterImage("H", [(0, 2)]), "holding", 1, [1, 2])
+
+
+async def test_queued_writes_are_coalesced():
+    async with AirPackSimulator() as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, write_debounce=0.2)
+        flushed = []
+        controller.set_write_listener(lambda values, confirmed: flushed.append((dict(values), confirmed)))
+        try:
+            async def _write(address, value, delay):
+                await asyncio.sleep(delay)
+                return await controller.queue_write(address, value)
+
+            writes = [
+                asyncio.ensure_future(_write(address, value, delay))
+                for address, value, delay in ((4210, 10, 0), (4210, 20, 0.01), (4211, 5, 0.02), (4304, 1, 0.03))
+            ]
+            # Wywołujący, który zrezygnował (np. timeout usługi), nie anuluje zapisów reszty paczki
+            await asyncio.sleep(0.035)
+            writes[2].cancel()
+            results = await asyncio.gather(*writes, return_exceptions=True)
+            assert isinstance(results[2], asyncio.CancelledError)
+            assert [r.value for i, r in enumerate(results) if i != 2] == [20, 20, 1]
+            assert sim.stats.requests[FC_WRITE_MULTIPLE] == 1
+            assert sim.stats.requests[FC_WRITE_SINGLE] == 1
+            assert flushed == [({4210: 20, 4211: 5, 4304: 1}, False)]
+            holding = sim.registers(10, "holding")
+            assert (holding[4210], holding[4211], holding[4304]) == (20, 5, 1)
+        finally:
+            await controller.stop()
+
+
+async def test_unconfirmed_write_survives_a_failed_block():
+    async with AirPackSimulator() as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10)
+        try:
+            data = await controller.fetch_data()
+            read = data.holding.get(4210)
+            optimistic = replace(
+                data, holding=data.holding.with_values({4210: read + 5}), unconfirmed=frozenset({4210})
+            )
+
+            sim.reject = {("holding", 4210)}
+            failed = await controller.fetch_data()
+            assert "holding 4192-4224" in failed.failed_blocks
+            carried = failed.with_unconfirmed(optimistic)
+            assert carried.holding.get(4210) == read + 5
+            assert carried.unconfirmed == {4210}
+
+            sim.reject = set()
+            settled = (await controller.fetch_data()).with_unconfirmed(carried)
+            assert settled.holding.get(4210) == read
+            assert not settled.unconfirmed
+        finally:
+            await controller.stop()
@@ -0,0 +1,34 @@
+from custom_components.thessla_green.read_planner import ReadPlanner, expand_blocks, split_runs
+
+
+def test_merges_addresses_within_max_gap():
+    planner = ReadPlanner(max_gap=2, max_count=125)
+    assert planner.plan({1, 2, 4, 10, 11}) == [(1, 4), (10, 2)]
+
+
+def test_splits_blocks_at_max_count():
+    planner = ReadPlanner(max_gap=10, max_count=4)
+    assert planner.plan(range(10)) == [(0, 4), (4, 4), (8, 2)]
+
+
+def test_rejected_addresses_are_never_filler():
+    planner = ReadPlanner(max_gap=5, max_count=125)
+    assert planner.mark_rejected({3})
+    assert not planner.mark_rejected({3})
+    assert planner.plan({1, 2, 4, 5}) == [(1, 2), (4, 2)]
+
+
+def test_spans_contain_every_block_of_a_subset_plan():
+    planner = ReadPlanner(max_gap=3, max_count=5)
+    planner.mark_rejected({40})
+    addresses = {0, 2, 4, 6, 8, 20, 21, 39, 41}
+    spans = planner.spans(addresses)
+    assert spans == [(0, 9), (20, 2), (39, 1), (41, 1)]
+    for subset in ({0, 8}, {2, 4, 6}, {4, 6, 8, 20}, {39, 41}, addresses):
+        for start, count in planner.plan(subset):
+            assert any(s <= start and start + count <= s + c for s, c in spans)
+
+
+def test_split_runs_and_expand_blocks():
+    assert split_runs(10, 8, {10, 11, 14, 17, 30}) == [(10, 2), (14, 1), (17, 1)]
+    assert expand_blocks([(1, 2), (5, 1)]) == {1, 2, 5}
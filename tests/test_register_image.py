@@ -0,0 +1,51 @@
+import pytest
+
+from custom_components.thessla_green.register_image import RegisterImage
+
+
+def test_fill_get_and_timestamp():
+    image = RegisterImage("H", [(10, 3)])
+    image.fill(10, [1, 2, 3], stamp=5.0)
+    assert [image.get(a) for a in (9, 10, 11, 12, 13)] == [None, 1, 2, 3, None]
+    assert image.timestamp(11) == 5.0
+    assert dict(image.items()) == {10: 1, 11: 2, 12: 3}
+    with pytest.raises(KeyError):
+        image.fill(12, [1, 2])
+
+
+def test_snapshot_is_frozen_and_independent():
+    image = RegisterImage("H", [(0, 2)])
+    image.fill(0, [1, 2])
+    snapshot = image.snapshot()
+    image.set(0, 9)
+    assert snapshot.get(0) == 1
+    with pytest.raises(TypeError):
+        snapshot.set(0, 3)
+
+
+def test_diff_reports_changed_and_new_addresses():
+    image = RegisterImage("H", [(0, 4)])
+    image.fill(0, [1, 2])
+    before = image.snapshot()
+    image.fill(1, [5, 6])
+    assert image.snapshot().diff(before) == {1, 2}
+    assert image.snapshot().diff(image.snapshot()) == set()
+
+
+def test_reshape_keeps_known_values():
+    image = RegisterImage("H", [(10, 2), (20, 2)])
+    image.fill(10, [1, 2], stamp=1.0)
+    image.fill(20, [3, 4], stamp=2.0)
+    image.reshape([(8, 4), (11, 11)])
+    assert dict(image.items()) == {10: 1, 11: 2, 20: 3, 21: 4}
+    assert image.timestamp(20) == 2.0
+    # Bloki nakładające się łączone są w jeden segment
+    image.fill(8, list(range(14)))
+
+
+def test_with_values_keeps_read_stamp_unless_given():
+    image = RegisterImage("H", [(0, 2)])
+    image.fill(0, [1, 2], stamp=1.0)
+    optimistic = image.snapshot().with_values({0: 7})
+    assert optimistic.get(0) == 7 and optimistic.timestamp(0) == 1.0
+    assert image.snapshot().with_values({0: 7}, stamp=3.0).timestamp(0) == 3.0
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.thessla_green import sensor  # noqa: E402
+from custom_components.thessla_green.registers import TEMP_CZERPNIA  # noqa: E402
+
+
+@pytest.fixture
+def temperature(monkeypatch):
+    inputs = {}
+    coordinator = SimpleNamespace(
+        safe_data=SimpleNamespace(input=SimpleNamespace(get=inputs.get), restored=False),
+        registers_fresh=lambda registers: True,
+    )
+    entity = sensor.ModbusGenericSensor(
+        coordinator, "Temperatura", TEMP_CZERPNIA, precision=1, deadband=0.2, max_silence=900
+    )
+    written = []
+    monkeypatch.setattr(sensor.SensorEntity, "async_write_ha_state", lambda self: written.append(self.native_value))
+
+    def _update(value, restored=False):
+        inputs[TEMP_CZERPNIA.address] = round(value * 10) & 0xFFFF
+        coordinator.safe_data.restored = restored
+        entity._handle_coordinator_update()
+
+    _update(21.1)
+    written.clear()
+    return _update, written
+
+
+def test_deadband_writes_a_change_exactly_at_the_threshold(temperature):
+    update, written = temperature
+    update(21.2)
+    assert written == []
+    # abs(21.3 - 21.1) w float to 0.1999… – zmiana równa martwej strefie musi zostać zapisana
+    update(21.3)
+    assert written == [21.3]
+    update(21.1)
+    assert written == [21.3, 21.1]
+
+
+def test_end_of_restored_data_is_written(temperature):
+    update, written = temperature
+    update(21.1, restored=True)
+    update(21.1)
+    assert written == [21.1, 21.1]
@@ -0,0 +1,397 @@
+"""Lokalny symulator rekuperatora AirPack (Modbus TCP) do testów i benchmarków integracji.
+
+Model obejmuje rejestry używane przez integrację: input 16–22, holding 256/4192–4711/8192–8444
+i coile 9–11. Obsługiwane funkcje: FC1, FC3, FC4, FC6, FC16. Symulator nie wymaga żadnych
+zależności poza biblioteką standardową.
+
+Przykład::
+
+    python tools/airpack_simulator.py --port 8899 --slave 10 --latency 0.06 --drop-rate 0.01
+
+albo z kodu (np. w benchmarku)::
+
+    async with AirPackSimulator(latency=0.05) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10)
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import struct
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+_LOGGER = logging.getLogger("airpack_simulator")
+
+FC_READ_COILS = 0x01
+FC_READ_HOLDING = 0x03
+FC_READ_INPUT = 0x04
+FC_WRITE_SINGLE = 0x06
+FC_WRITE_MULTIPLE = 0x10
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SERVER_DEVICE_BUSY = 0x06
+GATEWAY_TARGET_FAILED = 0x0B
+
+MAX_REGISTERS_PER_READ = 125
+MAX_COILS_PER_READ = 2000
+
+# Zakresy adresów, na które urządzenie odpowiada (start, liczba) – odczyt poza nimi kończy się wyjątkiem 0x02
+INPUT_RANGES: List[Tuple[int, int]] = [(0, 32)]
+HOLDING_RANGES: List[Tuple[int, int]] = [(256, 16), (4192, 144), (4387, 1), (4704, 16), (8192, 48), (8330, 8), (8444, 4)]
+COIL_RANGES: List[Tuple[int, int]] = [(0, 16)]
+
+
+def _signed(value: float) -> int:
+    return int(round(value)) & 0xFFFF
+
+
+def default_registers() -> Dict[str, Dict[int, int]]:
+    """Wartości startowe zbliżone do pracującej centrali (zima, tryb automatyczny)."""
+    holding = {address: 0 for start, count in HOLDING_RANGES for address in range(start, start + count)}
+    holding.update({
+        256: 180, 257: 175,          # strumienie nawiew / wywiew [m3/h]
+        4208: 0, 4209: 1, 4210: 50,  # tryb pracy, sezon (zima), prędkość ręczna [%]
+        4224: 0, 4304: 1, 4320: 1,   # tryb specjalny, komfort, bypass zamknięty
+        4387: 1, 4711: 0,            # ON/OFF, tryb ERV
+    })
+    inputs = {address: 0 for start, count in INPUT_RANGES for address in range(start, start + count)}
+    inputs.update({16: _signed(-21), 17: _signed(182), 18: _signed(215), 19: _signed(-5), 22: _signed(341)})
+    coils = {address: 0 for start, count in COIL_RANGES for address in range(start, start + count)}
+    coils.update({9: 0, 10: 1, 11: 1})
+    return {"holding": holding, "input": inputs, "coil": coils}
+
+
+@dataclass
+class SimulatorStats:
+    """Liczniki zapytań – benchmarki porównują je między wersjami."""
+    requests: Counter = field(default_factory=Counter)
+    dropped: int = 0
+    exceptions: Counter = field(default_factory=Counter)
+    connections: int = 0
+    rejected_connections: int = 0
+    # Najwięcej zapytań obsługiwanych jednocześnie – 1 oznacza brak pipeliningu
+    max_in_flight: int = 0
+    in_flight: int = 0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def reset(self):
+        self.requests.clear()
+        self.exceptions.clear()
+        self.dropped = 0
+        self.connections = 0
+        self.rejected_connections = 0
+        self.max_in_flight = self.in_flight
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": {f"fc{fc}": count for fc, count in sorted(self.requests.items())},
+            "total_requests": self.total_requests,
+            "dropped": self.dropped,
+            "exceptions": {f"0x{code:02x}": count for code, count in sorted(self.exceptions.items())},
+            "connections": self.connections,
+            "rejected_connections": self.rejected_connections,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+class AirPackSimulator:
+    """Modbus TCP server emulating one gateway with one or more AirPack units on its RS485 bus.
+
+    ``latency`` (+ random ``jitter``) is the network part of a round trip and overlaps between
+    pipelined requests; ``bus_time`` is the RS485 part and is serialised across all connections
+    and slaves, like on a real gateway. Faults are injected per request with the given rates.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        slaves: Iterable[int] = (10,),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bus_time: float = 0.0,
+        drop_rate: float = 0.0,
+        error_rate: float = 0.0,
+        error_code: int = SERVER_DEVICE_BUSY,
+        connect_delay: float = 0.0,
+        drift: float = 0.0,
+        write_delay: float = 0.0,
+        max_connections: int = 0,
+        reject: Iterable[Tuple[str, int]] = (),
+        seed: int | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.bus_time = bus_time
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.connect_delay = connect_delay
+        self.drift = drift
+        self.write_delay = write_delay
+        self.max_connections = max_connections
+        # Adresy, których odczyt urządzenie odrzuca (0x02), np. do testu dzielenia scalonych bloków
+        self.reject = set(reject)
+
+        self.units: Dict[int, Dict[str, Dict[int, int]]] = {slave: default_registers() for slave in slaves}
+        self.stats = SimulatorStats()
+        self._random = random.Random(seed)
+        self._bus = asyncio.Lock()
+        self._server: asyncio.base_events.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._handlers: set[asyncio.Task] = set()
+        self._drift_task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "AirPackSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.drift:
+            self._drift_task = asyncio.create_task(self._drift_loop())
+        _LOGGER.info("AirPack simulator listening on %s:%d, slaves %s", self.host, self.port, sorted(self.units))
+
+    async def stop(self):
+        if self._drift_task:
+            self._drift_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        for writer in list(self._writers):
+            writer.close()
+        if self._handlers:
+            # Zamknięte gniazdo kończy pętlę odczytu – czekamy, aż obsługa połączeń zakończy się sama
+            await asyncio.wait(self._handlers, timeout=1.0)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def registers(self, slave: int = 10, kind: str = "holding") -> Dict[int, int]:
+        return self.units[slave][kind]
+
+    # --- połączenia ----------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.max_connections and len(self._writers) >= self.max_connections:
+            # Tanie bramki przyjmują tylko 1–2 gniazda – nadmiarowe są od razu zamykane
+            self.stats.rejected_connections += 1
+            writer.close()
+            return
+        self.stats.connections += 1
+        self._writers.add(writer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        if self.connect_delay:
+            # Wolne zestawienie połączenia: pierwsze zapytanie jest obsługiwane dopiero po tym czasie
+            await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction, protocol, length, unit = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                if protocol != 0:
+                    continue
+                # Każde zapytanie osobno – klient może wysłać kolejne, zanim dostanie odpowiedź (pipelining)
+                task = asyncio.create_task(self._respond(writer, transaction, unit, pdu))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, transaction: int, unit: int, pdu: bytes):
+        function = pdu[0]
+        self.stats.requests[function] += 1
+        self.stats.in_flight += 1
+        self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+        try:
+            await self._process(writer, transaction, unit, function, pdu)
+        finally:
+            self.stats.in_flight -= 1
+
+    async def _process(self, writer: asyncio.StreamWriter, transaction: int, unit: int, function: int, pdu: bytes):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay / 2)
+        async with self._bus:
+            if self.bus_time:
+                await asyncio.sleep(self.bus_time)
+            if self._random.random() < self.drop_rate:
+                # Utracona odpowiedź – klient musi zakończyć zapytanie własnym timeoutem
+                self.stats.dropped += 1
+                return
+            if unit not in self.units:
+                response = self._exception(function, GATEWAY_TARGET_FAILED)
+            elif self._random.random() < self.error_rate:
+                response = self._exception(function, self.error_code)
+            else:
+                response = self._execute(self.units[unit], function, pdu[1:])
+        if delay:
+            await asyncio.sleep(delay / 2)
+
+        if writer.is_closing():
+            return
+        writer.write(struct.pack(">HHHB", transaction, 0, len(response) + 1, unit) + response)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # --- funkcje Modbus --------------------------------------------------------
+
+    def _exception(self, function: int, code: int) -> bytes:
+        self.stats.exceptions[code] += 1
+        return bytes([function | 0x80, code])
+
+    def _readable(self, kind: str, registers: Dict[int, int], start: int, count: int) -> bool:
+        return all(
+            address in registers and (kind, address) not in self.reject
+            for address in range(start, start + count)
+        )
+
+    def _execute(self, unit: Dict[str, Dict[int, int]], function: int, data: bytes) -> bytes:
+        if function in (FC_READ_COILS, FC_READ_HOLDING, FC_READ_INPUT):
+            start, count = struct.unpack(">HH", data[:4])
+            kind = {FC_READ_COILS: "coil", FC_READ_HOLDING: "holding", FC_READ_INPUT: "input"}[function]
+            limit = MAX_COILS_PER_READ if kind == "coil" else MAX_REGISTERS_PER_READ
+            if not 1 <= count <= limit:
+                return self._exception(function, ILLEGAL_DATA_VALUE)
+            if not self._readable(kind, unit[kind], start, count):
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            values = [unit[kind][address] for address in range(start, start + count)]
+            if kind == "coil":
+                packed = bytearray((count + 7) // 8)
+                for i, bit in enumerate(values):
+                    if bit:
+                        packed[i // 8] |= 1 << (i % 8)
+                return bytes([function, len(packed)]) + bytes(packed)
+            return bytes([function, 2 * count]) + struct.pack(f">{count}H", *values)
+
+        if function == FC_WRITE_SINGLE:
+            address, value = struct.unpack(">HH", data[:4])
+            if address not in unit["holding"]:
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            self._apply_write(unit, {address: value})
+            return bytes([function]) + data[:4]
+
+        if function == FC_WRITE_MULTIPLE:
+            start, count, size = struct.unpack(">HHB", data[:5])
+            if count < 1 or size != 2 * count or len(data) < 5 + size:
+                return self._exception(function, ILLEGAL_DATA_VALUE)
+            if not all(address in unit["holding"] for address in range(start, start + count)):
+                return self._exception(function, ILLEGAL_DATA_ADDRESS)
+            values = struct.unpack(f">{count}H", data[5:5 + size])
+            self._apply_write(unit, {start + i: value for i, value in enumerate(values)})
+            return bytes([function]) + data[:4]
+
+        return self._exception(function, ILLEGAL_FUNCTION)
+
+    def _apply_write(self, unit: Dict[str, Dict[int, int]], values: Dict[int, int]):
+        # Centrala przyjmuje zapis od razu, ale nowa wartość bywa widoczna w odczycie dopiero po chwili
+        def _commit():
+            unit["holding"].update(values)
+            if 4210 in values:
+                # Strumienie powietrza podążają za prędkością ręczną
+                unit["holding"][256] = 60 + 3 * values[4210]
+                unit["holding"][257] = 55 + 3 * values[4210]
+
+        if self.write_delay:
+            asyncio.get_running_loop().call_later(self.write_delay, _commit)
+        else:
+            _commit()
+
+    async def _drift_loop(self):
+        """Powolne błądzenie losowe temperatur (co sekundę), żeby odczyty się zmieniały."""
+        while True:
+            await asyncio.sleep(1.0)
+            for unit in self.units.values():
+                for address in (16, 17, 18, 19, 22):
+                    raw = unit["input"][address]
+                    raw = raw - 0x10000 if raw > 0x7FFF else raw
+                    unit["input"][address] = _signed(raw + self._random.uniform(-self.drift, self.drift) * 10)
+
+
+def _parse_reject(values: List[str]) -> List[Tuple[str, int]]:
+    reject = []
+    for value in values:
+        kind, _, address = value.partition(":")
+        reject.append((kind, int(address)))
+    return reject
+
+
+async def _serve(args: argparse.Namespace):
+    simulator = AirPackSimulator(
+        host=args.host,
+        port=args.port,
+        slaves=args.slave,
+        latency=args.latency,
+        jitter=args.jitter,
+        bus_time=args.bus_time,
+        drop_rate=args.drop_rate,
+        error_rate=args.error_rate,
+        error_code=args.error_code,
+        connect_delay=args.connect_delay,
+        drift=args.drift,
+        write_delay=args.write_delay,
+        max_connections=args.max_connections,
+        reject=_parse_reject(args.reject),
+        seed=args.seed,
+    )
+    async with simulator:
+        try:
+            await asyncio.Event().wait()
+        finally:
+            _LOGGER.info("Request statistics: %s", simulator.stats.as_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AirPack Modbus TCP simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--slave", type=int, action="append", help="slave id (repeat for several units)")
+    parser.add_argument("--latency", type=float, default=0.0, help="network round trip [s]")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency [s]")
+    parser.add_argument("--bus-time", type=float, default=0.0, help="serialised RS485 time per request [s]")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of requests left unanswered")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with --error-code")
+    parser.add_argument("--error-code", type=lambda v: int(v, 0), default=SERVER_DEVICE_BUSY)
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="delay before a new connection is served [s]")
+    parser.add_argument("--drift", type=float, default=0.0, help="temperature random walk per second [°C]")
+    parser.add_argument("--write-delay", type=float, default=0.0, help="delay before written values become readable [s]")
+    parser.add_argument("--max-connections", type=int, default=0, help="reject sockets above this count (0 = unlimited)")
+    parser.add_argument("--reject", action="append", default=[], metavar="KIND:ADDRESS",
+                        help="answer reads covering this address with exception 0x02, e.g. holding:4200")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.slave = args.slave or [10]
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
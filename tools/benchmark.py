@@ -0,0 +1,271 @@
+"""Benchmark cyklu odpytywania, zapisu i powiadamiania encji na lokalnym symulatorze AirPack.
+
+Wyniki są w JSON, żeby dało się porównać wersje::
+
+    python tools/benchmark.py --output bench_0.2.5.json
+    python tools/benchmark.py --compare bench_0.2.5.json
+
+Odczyt i zapis działają bez Home Assistant (moduły kontrolera są importowane z pominięciem
+``__init__`` integracji). Część "entity_fanout" wymaga zainstalowanego Home Assistant (jak każde
+środowisko deweloperskie integracji); bez niego jest pomijana z podaniem powodu.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    import homeassistant  # noqa: F401
+except ImportError:
+    # __init__ integracji importuje Home Assistant – pakiet bez niego, moduły kontrolera nie zależą od HA
+    import types
+
+    _package = types.ModuleType("custom_components.thessla_green")
+    _package.__path__ = [str(ROOT / "custom_components" / "thessla_green")]
+    sys.modules[_package.__name__] = _package
+
+from airpack_simulator import AirPackSimulator  # noqa: E402
+from custom_components.thessla_green.const import DOMAIN, TIER_FAST  # noqa: E402
+from custom_components.thessla_green.modbus_controller import ThesslaGreenModbusController  # noqa: E402
+
+MANIFEST = ROOT / "custom_components" / "thessla_green" / "manifest.json"
+
+# Metryki, dla których większa wartość jest lepsza (reszta: mniejsza = lepsza)
+HIGHER_IS_BETTER = {"read_speedup"}
+
+
+def _summary(samples: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    """Podsumowanie próbek (domyślnie w ms)."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "mean": round(statistics.fmean(samples) * scale, 3),
+        "p50": round(statistics.median(samples) * scale, 3),
+        "p95": round(p95 * scale, 3),
+        "min": round(ordered[0] * scale, 3),
+        "max": round(ordered[-1] * scale, 3),
+    }
+
+
+def _simulator(args: argparse.Namespace, **overrides) -> AirPackSimulator:
+    options = dict(
+        latency=args.latency, jitter=args.jitter, bus_time=args.bus_time, drift=0.0, seed=args.seed,
+    )
+    options.update(overrides)
+    return AirPackSimulator(**options)
+
+
+async def bench_poll_cycle(args: argparse.Namespace, pipeline_window: int) -> dict:
+    """Czas ściany i liczba zapytań dla pełnego cyklu oraz cyklu samej grupy "fast"."""
+    async with _simulator(args) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, pipeline_window=pipeline_window)
+        try:
+            await controller.fetch_data()  # połączenie i ewentualne dzielenie bloków poza pomiarem
+            results = {}
+            for name, tiers in (("all_tiers", None), ("fast_tier", {TIER_FAST})):
+                sim.stats.reset()
+                walls, speedups = [], []
+                for _ in range(args.cycles):
+                    started = time.perf_counter()
+                    data = await controller.fetch_data(tiers)
+                    walls.append(time.perf_counter() - started)
+                    speedups.append(data.read_speedup)
+                results[name] = {
+                    "wall_ms": _summary(walls),
+                    "requests_per_cycle": round(sim.stats.total_requests / args.cycles, 2),
+                    "read_speedup": round(statistics.fmean(speedups), 2),
+                }
+            results["pipelined"] = controller.pipelined
+            return results
+        finally:
+            await controller.stop()
+
+
+async def bench_write_latency(args: argparse.Namespace) -> dict:
+    """Czas od zapisu do pojawienia się wartości w encjach (listener zapisu koordynatora)."""
+    async with _simulator(args) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10, write_debounce=0.0)
+        loop = asyncio.get_running_loop()
+        pushed: Dict[bool, asyncio.Future] = {}
+
+        def _listener(values, confirmed):
+            future = pushed.get(confirmed)
+            if future and not future.done():
+                future.set_result(loop.time())
+
+        controller.set_write_listener(_listener)
+        try:
+            await controller.fetch_data()
+            results = {}
+            for name, verify in (("optimistic", False), ("verified", True)):
+                sim.stats.reset()
+                latencies = []
+                for i in range(args.writes):
+                    pushed.clear()
+                    pushed[verify] = loop.create_future()
+                    started = loop.time()
+                    await controller.queue_write(4210, 40 + i % 50, verify=verify)
+                    latencies.append(await pushed[verify] - started)
+                results[name] = {
+                    "latency_ms": _summary(latencies),
+                    "requests_per_write": round(sim.stats.total_requests / args.writes, 2),
+                }
+            return results
+        finally:
+            await controller.stop()
+
+
+async def bench_entity_fanout(args: argparse.Namespace) -> dict:
+    """Koszt CPU jednej aktualizacji koordynatora dla wszystkich encji wszystkich platform."""
+    try:
+        from homeassistant.core import HomeAssistant
+    except ImportError as e:
+        return {"skipped": f"Home Assistant is not installed ({e})"}
+
+    from types import SimpleNamespace
+
+    from custom_components.thessla_green import PLATFORMS
+    from custom_components.thessla_green.coordinator import ThesslaGreenCoordinator
+    import importlib
+
+    hass = HomeAssistant(str(ROOT))
+    async with _simulator(args) as sim:
+        controller = ThesslaGreenModbusController("127.0.0.1", sim.port, 10)
+        coordinator = ThesslaGreenCoordinator(hass, controller, scan_interval=30)
+        entry = SimpleNamespace(entry_id="benchmark", options={}, data={})
+        hass.data[DOMAIN] = {entry.entry_id: {"controller": controller, "coordinator": coordinator, "slave": 10}}
+
+        entities = []
+        for name in PLATFORMS:
+            module = importlib.import_module(f"custom_components.thessla_green.{name}")
+            await module.async_setup_entry(hass, entry, entities.extend)
+
+        writes = 0
+
+        def _state_writer(entity):
+            # Zamiast maszyny stanów: wyliczenie tego, co HA wyliczyłby przy zapisie stanu
+            def _write():
+                nonlocal writes
+                writes += 1
+                return entity.available, entity.state, entity.extra_state_attributes
+            return _write
+
+        try:
+            snapshots = [await controller.fetch_data()]
+            inputs = sim.registers(10, "input")
+            inputs[16] = (inputs[16] + 3) & 0xFFFF  # zmiana jednej temperatury między migawkami
+            snapshots.append(await controller.fetch_data())
+
+            for entity in entities:
+                entity.hass = hass
+                entity.async_write_ha_state = _state_writer(entity)
+                await entity.async_added_to_hass()
+
+            coordinator.data = snapshots[0]
+            coordinator.async_update_listeners()
+            writes, cpu = 0, []
+            for i in range(args.updates):
+                coordinator.data = snapshots[(i + 1) % 2]
+                started = time.process_time()
+                coordinator.async_update_listeners()
+                cpu.append(time.process_time() - started)
+            return {
+                "entities": len(entities),
+                "state_writes_per_update": round(writes / args.updates, 2),
+                "cpu_us": _summary(cpu, scale=1e6),
+            }
+        finally:
+            await controller.stop()
+            await hass.async_stop(force=True)
+
+
+def _flatten(data, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Zmiany względem poprzedniego wyniku, z oznaczeniem pogorszeń."""
+    now, before = _flatten(current["results"]), _flatten(baseline["results"])
+    lines = [f"Compared with {baseline.get('version')} ({baseline.get('timestamp')})"]
+    for path in sorted(now.keys() & before.keys()):
+        old, new = before[path], now[path]
+        if not old:
+            continue
+        change = (new - old) / abs(old) * 100
+        worse = change < 0 if HIGHER_IS_BETTER & set(path.split(".")) else change > 0
+        flag = " <-- regression" if worse and abs(change) >= 10 else ""
+        lines.append(f"{path}: {old} -> {new} ({change:+.1f}%){flag}")
+    return lines
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = {
+        "poll_cycle": {
+            "serial": await bench_poll_cycle(args, pipeline_window=1),
+            "pipelined": await bench_poll_cycle(args, pipeline_window=args.pipeline_window),
+        },
+        "write_latency": await bench_write_latency(args),
+        "entity_fanout": await bench_entity_fanout(args),
+    }
+    return {
+        "version": json.loads(MANIFEST.read_text())["version"],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("cycles", "writes", "updates", "latency", "jitter", "bus_time", "pipeline_window", "seed")
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thessla Green integration benchmarks")
+    parser.add_argument("--cycles", type=int, default=20, help="poll cycles per scenario")
+    parser.add_argument("--writes", type=int, default=10, help="writes per scenario")
+    parser.add_argument("--updates", type=int, default=200, help="coordinator updates for the fan-out test")
+    parser.add_argument("--latency", type=float, default=0.04, help="simulated network round trip [s]")
+    parser.add_argument("--jitter", type=float, default=0.0, help="simulated random extra latency [s]")
+    parser.add_argument("--bus-time", type=float, default=0.01, help="simulated RS485 time per request [s]")
+    parser.add_argument("--pipeline-window", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        for line in compare(report, json.loads(args.compare.read_text())):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()